@@ -1,19 +1,35 @@
 import asyncio
-from typing import Any, Awaitable, Callable, Dict, Generic, List, Set, Type, Union
-
-from graia.broadcast import Broadcast
-from graia.broadcast.interfaces.dispatcher import DispatcherInterface
-from loguru import logger
-from rich.console import Console
-from rich.logging import RichHandler
-from rich.status import Status
-
-from avilla.core.event import MessageChainDispatcher, RelationshipDispatcher
-from avilla.core.launch import LaunchComponent, resolve_requirements
-from avilla.core.network.service import Service
-from avilla.core.protocol import BaseProtocol
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    Generic,
+    Hashable,
+    List,
+    Optional,
+    Set,
+    Type,
+    TypeVar,
+    Union,
+)
+
+from avilla.core.launch import LaunchComponent, LaunchTiming, format_timings, run_components
+from avilla.core.network.registry import ServiceRegistry
 from avilla.core.typing import T_Config, T_ExecMW, T_Protocol
 
+# rich, loguru, graia-broadcast 与各个事件模型的导入开销较大, 推迟到真正用到时 (构造 Avilla, launch) 再导入,
+# 以免拖慢仅使用 avilla.core 中部分工具的场合 (命令行工具, 测试等).
+if TYPE_CHECKING:
+    from graia.broadcast import Broadcast
+    from graia.broadcast.interfaces.dispatcher import DispatcherInterface
+
+    from avilla.core.network.service import Service
+    from avilla.core.selectors import self as self_selector
+
+TService = TypeVar("TService", bound="Service")
+
 AVILLA_ASCII_LOGO = r"""\
     _        _ _ _
    / \__   _(_) | | __ _
@@ -23,42 +39,98 @@ AVILLA_ASCII_LOGO = r"""\
 
 
 class Avilla(Generic[T_Protocol, T_Config]):
-    broadcast: Broadcast
+    """`configs[protocol]` 为列表时, 为其中的每个配置 (即每个账号) 创建一个 protocol 实例, 它们共享 broadcast 与 services.
+
+    账号以 `protocol.get_self()` 区分; `protocol` 为第一个账号的实例, 以兼容单账号的用法.
+    protocol 通过 `BaseProtocol.post_event` 投递的事件在处理时, 注入的 protocol 与 Relationship 均属于该账号.
+    """
+
+    broadcast: "Broadcast"
+    protocol_class: Type[T_Protocol]
     protocol: T_Protocol
-    configs: Dict[Type[T_Protocol], T_Config]
+    protocols: Dict[Hashable, T_Protocol]  # self selector 的 as_key() -> protocol
+    configs: Dict[Type[T_Protocol], Union[T_Config, List[T_Config]]]
     middlewares: List[T_ExecMW]
-    services: List[Service]
+    services: ServiceRegistry
 
     launch_components: Dict[str, LaunchComponent]
+    launch_timings: Dict[str, LaunchTiming]
+
+    _account_components: Dict[Hashable, str]
 
     def __init__(
         self,
-        broadcast: Broadcast,
+        broadcast: "Broadcast",
         protocol: Type[T_Protocol],
-        services: List[Service],
+        services: List["Service"],
         configs: Dict,
         middlewares: List[T_ExecMW] = None,
     ):
+        from avilla.core.context import ctx_protocol
+        from avilla.core.event import MessageChainDispatcher, RelationshipDispatcher
+
         self.broadcast = broadcast
-        self.protocol = protocol(self, configs.get(protocol))
+        self.protocol_class = protocol
+        self.protocols = {}
         self.configs = configs
-        self.services = services
-        self.middlewares = [target_context_injector, *(middlewares or [])]  # TODO: 把那东西拿回来
-        self.launch_components = {
-            **({i.launch_component.id: i.launch_component for i in services}),
-            self.protocol.launch_component.id: self.protocol.launch_component,
-        }
+        self.services = ServiceRegistry(services)
+        # 执行目标由 Relationship.to 以 TargetInjector 逐次注入, 不再需要全局的中间件
+        self.middlewares = [*(middlewares or [])]
+        self.launch_timings = {}
+        self.launch_components = {i.launch_component.id: i.launch_component for i in services}
+        self._account_components = {}
+
+        account_configs = configs.get(protocol)
+        for config in account_configs if isinstance(account_configs, list) else [account_configs]:
+            self.add_account(config)
 
         self.broadcast.dispatcher_interface.inject_global_raw(
             RelationshipDispatcher(), MessageChainDispatcher()
         )
 
         @self.broadcast.dispatcher_interface.inject_global_raw
-        async def _(interface: DispatcherInterface):
+        async def _(interface: "DispatcherInterface"):
             if interface.annotation is Avilla:
                 return self
             elif interface.annotation is protocol:
-                return self.protocol
+                return ctx_protocol.get(self.protocol)
+
+    def add_account(self, config: T_Config) -> T_Protocol:
+        "以 config 创建一个新的 protocol 实例 (账号), 需要在 launch 之前调用."
+        instance = self.protocol_class(self, config)
+        account = instance.get_self().as_key()
+        if account in self.protocols:
+            raise ValueError("existed account")
+        component = instance.launch_component
+        if component.id in self.launch_components:
+            component = LaunchComponent(
+                f"{component.id}#{instance.get_self()!r}",
+                component.required,
+                component.mainline,
+                component.prepare,
+                component.cleanup,
+            )
+        self.launch_components[component.id] = component
+        self._account_components[account] = component.id
+        self.protocols[account] = instance
+        if len(self.protocols) == 1:
+            self.protocol = instance
+        return instance
+
+    def remove_account(self, account: "self_selector") -> T_Protocol:
+        key = account.as_key()
+        if key not in self.protocols:
+            raise ValueError("account doesn't exist.")
+        if len(self.protocols) == 1:
+            raise ValueError("cannot remove the last account.")
+        instance = self.protocols.pop(key)
+        del self.launch_components[self._account_components.pop(key)]
+        if instance is self.protocol:
+            self.protocol = next(iter(self.protocols.values()))
+        return instance
+
+    def get_protocol(self, account: "self_selector") -> Optional[T_Protocol]:
+        return self.protocols.get(account.as_key())
 
     def new_launch_component(
         self,
@@ -77,25 +149,32 @@ class Avilla(Generic[T_Protocol, T_Config]):
             raise KeyError("id doesn't exist.")
         del self.launch_components[id]
 
-    def add_service(self, service: Service):
-        if service in self.services:
-            raise ValueError("existed service")
-        self.services.append(service)
+    def add_service(self, service: "Service"):
+        self.services.add(service)
         launch_component = service.launch_component
         self.launch_components[launch_component.id] = launch_component
 
-    def remove_service(self, service: Service):
-        if service not in self.services:
-            raise ValueError("service doesn't exist.")
+    def remove_service(self, service: "Service"):
         self.services.remove(service)
         del self.launch_components[service.launch_component.id]
 
-    def get_service(self, id: str) -> Union[Service, None]:
-        for service in self.services:
-            if service.id.avilla_uri == id:
-                return service
+    def get_service(self, id: str) -> Optional["Service"]:
+        return self.services.get(id)
+
+    def get_service_by_type(self, service_type: Type[TService]) -> Optional[TService]:
+        return self.services.first_of_type(service_type)
 
     async def launch(self):
+        from loguru import logger
+        from rich.console import Console
+        from rich.logging import RichHandler
+        from rich.status import Status
+
+        from avilla.core.context import ctx_avilla
+        from avilla.core.protocol import BaseProtocol
+        from avilla.core.provider import HttpGetProvider
+
+        ctx_avilla.set(self)
         console = Console()
         logger.configure(
             handlers=[
@@ -112,34 +191,35 @@ class Avilla(Generic[T_Protocol, T_Config]):
         )
         for service in self.services:
             logger.info(f"using service: {service.id.avilla_uri}")
-        if self.protocol.__class__.platform is not BaseProtocol.platform:
-            logger.info(f"using platform: {self.protocol.__class__.platform.universal_identifier}")
+        if self.protocol_class.platform is not BaseProtocol.platform:
+            logger.info(f"using platform: {self.protocol_class.platform.universal_identifier}")
+        logger.info(f"accounts: {len(self.protocols)}")
         logger.info(f"launch components: {len(self.launch_components)}")
         with Status("[orange bold]preparing components...", console=console) as status:
-            for component_layer in resolve_requirements(set(self.launch_components.values())):
-                tasks = [
-                    asyncio.create_task(component.prepare(), name=component.id)
-                    for component in component_layer
-                    if component.prepare
-                ]
-                for task in tasks:
-                    task.add_done_callback(lambda t: status.update(f"{t.get_name()} prepared."))
-                await asyncio.wait(tasks)
+            self.launch_timings = await run_components(
+                self.launch_components.values(),
+                lambda component: component.prepare,
+                on_finished=lambda component: status.update(f"{component.id} prepared."),
+            )
             status.update("all launch components prepared.")
+        logger.info(f"components prepared, timings:\n{format_timings(self.launch_timings)}")
         logger.info("[green bold]components prepared, switch to mainlines and block main thread.")
         try:
             await asyncio.gather(*[component.mainline() for component in self.launch_components.values()])
         finally:
             logger.info("[red bold]mainlines exited, cleanup start.")
-            for component_layer in reversed(resolve_requirements(set(self.launch_components.values()))):
-                tasks = [
-                    asyncio.create_task(component.cleanup(), name=component.id)
-                    for component in component_layer
-                    if component.cleanup
-                ]
-                for task in tasks:
-                    task.add_done_callback(lambda t: logger.info(f"{t.get_name()} cleanup finished."))
-                await asyncio.wait(tasks)
+            cleanup_timings = await run_components(
+                self.launch_components.values(),
+                lambda component: component.cleanup,
+                reverse=True,
+                suppress_exceptions=True,
+            )
+            for timing in cleanup_timings.values():
+                if timing.error is not None:
+                    logger.opt(exception=timing.error).error(f"{timing.component} cleanup failed.")
+                elif self.launch_components[timing.component].cleanup:
+                    logger.info(f"{timing.component} cleanup finished.")
+            await HttpGetProvider.close_shared_session()
             logger.info("[green bold]cleanup finished.")
             logger.warning("[red bold]exiting...")
 
@@ -1,8 +1,8 @@
 from pathlib import Path
-from typing import Optional
+from typing import Optional, Union
 
 from avilla.core.message.element import Element
-from avilla.core.provider import Provider, RawProvider
+from avilla.core.provider import FileProvider, Provider
 from avilla.core.resource import Resource
 
 
@@ -55,9 +55,8 @@ class Image(Element, Resource):
         self.provider = provider
 
     @classmethod
-    def fromLocalFile(cls, path: Path):
-        data = path.read_bytes()
-        return cls(RawProvider(data))
+    def fromLocalFile(cls, path: Union[Path, str]):
+        return cls(FileProvider(path))
 
     def asDisplay(self) -> str:
         return "[$Image]"
@@ -78,9 +77,8 @@ class Voice(Element, Resource):
         self.provider = provider
 
     @classmethod
-    def fromLocalFile(cls, path: Path):
-        data = path.read_bytes()
-        return cls(RawProvider(data))
+    def fromLocalFile(cls, path: Union[Path, str]):
+        return cls(FileProvider(path))
 
     def asDisplay(self) -> str:
         return "[$Voice]"
@@ -91,9 +89,8 @@ class Video(Element, Resource):
         self.provider = provider
 
     @classmethod
-    def fromLocalFile(cls, path: Path):
-        data = path.read_bytes()
-        return cls(RawProvider(data))
+    def fromLocalFile(cls, path: Union[Path, str]):
+        return cls(FileProvider(path))
 
     def asDisplay(self) -> str:
         return "[$Video]"
@@ -0,0 +1,304 @@
+import asyncio
+import heapq
+import inspect
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, AsyncGenerator, Callable, Dict, Hashable, List, Optional, Union
+
+from avilla.core.builtins.elements import Text
+from avilla.core.context import ctx_rsexec_to
+from avilla.core.execution import Execution
+from avilla.core.execution.message import MessageSend
+from avilla.core.message.chain import MessageChain
+from avilla.core.relationship import ExecutionShortcut, Relationship
+
+if TYPE_CHECKING:
+    from avilla.core.protocol import BaseProtocol
+
+
+class TokenBucket:
+    __slots__ = ("rate", "capacity", "tokens", "updated")
+
+    rate: float
+    capacity: float
+    tokens: float
+    updated: float
+
+    def __init__(self, rate: float, capacity: float) -> None:
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def delay(self, now: float) -> float:
+        "距离可以取得一个令牌还需要等待的秒数."
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def consume(self) -> None:
+        self.tokens -= 1
+
+
+@dataclass
+class SchedulerStats:
+    submitted: int = 0
+    dispatched: int = 0
+    coalesced: int = 0  # 被合并进其他 MessageSend 的数量
+    total_wait: float = 0.0
+    max_wait: float = 0.0
+
+    @property
+    def average_wait(self) -> float:
+        if not self.dispatched + self.coalesced:
+            return 0.0
+        return self.total_wait / (self.dispatched + self.coalesced)
+
+
+class _Pending:
+    __slots__ = ("priority", "sequence", "key", "protocol", "execution", "future", "enqueued", "followers")
+
+    priority: int
+    sequence: int
+    key: Hashable
+    protocol: "BaseProtocol"
+    execution: Execution
+    future: "asyncio.Future[Optional[ExecutionShortcut]]"
+    enqueued: float
+    followers: "List[_Pending]"  # 合并发送时, 由该执行 (leader) 代为发送, 尚未得到结果的执行
+
+    def __init__(
+        self,
+        priority: int,
+        sequence: int,
+        key: Hashable,
+        protocol: "BaseProtocol",
+        execution: Execution,
+        future: "asyncio.Future[Optional[ExecutionShortcut]]",
+        enqueued: float,
+    ) -> None:
+        self.priority = priority
+        self.sequence = sequence
+        self.key = key
+        self.protocol = protocol
+        self.execution = execution
+        self.future = future
+        self.enqueued = enqueued
+        self.followers = []
+
+    def __lt__(self, other: "_Pending") -> bool:
+        return (self.priority, self.sequence) < (other.priority, other.sequence)
+
+
+def _default_priority(execution: Execution) -> int:
+    return 0
+
+
+class ExecutionScheduler:
+    """限制发往协议端的执行频率的执行中间件.
+
+    每个账号 (protocol 实例) 的每个目标 (`ctx_rsexec_to`, 未设置时为 `Relationship.ctx`) 与全局各自持有一个令牌桶,
+    超出的执行在队列中等待, `priority` 返回值较小的先执行, 同优先级按提交顺序执行.
+    启用 `coalesce` 时, 队列中由同一账号发往同一目标的 MessageSend 会被合并为一条消息发送, 它们共享同一个结果;
+    负责发送的执行在发送完成前被取消时, 其余被合并的执行会回到队列中重新调度.
+
+    由于目标在进入中间件时确定, 通过 `rs.exec(...).to(...).use(scheduler)` 使用时应在 `to` 之后 `use`.
+    """
+
+    rate: float
+    burst: float
+    global_bucket: Optional[TokenBucket]
+    coalesce: bool
+    coalesce_separator: Optional[MessageChain]
+    priority: Callable[[Execution], int]
+    stats: SchedulerStats
+
+    _buckets: Dict[Hashable, TokenBucket]
+    _queues: Dict[Hashable, List[_Pending]]
+    _workers: Dict[Hashable, "asyncio.Task[None]"]
+    _sequence: int
+
+    def __init__(
+        self,
+        rate: float = 1.0,
+        burst: float = 5,
+        global_rate: Optional[float] = None,
+        global_burst: Optional[float] = None,
+        coalesce: bool = False,
+        coalesce_separator: Optional[MessageChain] = None,
+        priority: Callable[[Execution], int] = _default_priority,
+    ) -> None:
+        self.rate = rate
+        self.burst = burst
+        self.global_bucket = (
+            TokenBucket(global_rate, global_burst or global_rate) if global_rate is not None else None
+        )
+        self.coalesce = coalesce
+        self.coalesce_separator = (
+            coalesce_separator if coalesce_separator is not None else MessageChain.create([Text("\n")])
+        )
+        self.priority = priority
+        self.stats = SchedulerStats()
+        self._buckets = {}
+        self._queues = {}
+        self._workers = {}
+        self._sequence = 0
+
+    def __call__(self, rs: "Union[Relationship, BaseProtocol]", execution: Execution):
+        return self._schedule(rs, execution)
+
+    def queue_depth(self, target: Optional[Hashable] = None) -> int:
+        if target is not None:
+            return len(self._queues.get(target, ()))
+        return sum(len(queue) for queue in self._queues.values())
+
+    @staticmethod
+    def _protocol_of(rs: "Union[Relationship, BaseProtocol]") -> "BaseProtocol":
+        # BaseProtocol.exec_directly 以 protocol 本身调用中间件
+        return rs.protocol if isinstance(rs, Relationship) else rs
+
+    @classmethod
+    def target_key(cls, rs: "Union[Relationship, BaseProtocol]") -> Hashable:
+        "令牌桶与合并共用的键: 账号 (protocol 实例) 与目标."
+        target = ctx_rsexec_to.get() or getattr(rs, "ctx", None)
+        return (cls._protocol_of(rs), target.as_key() if target is not None else None)
+
+    @asynccontextmanager
+    async def _schedule(
+        self, rs: "Union[Relationship, BaseProtocol]", execution: Execution
+    ) -> AsyncGenerator[Optional[ExecutionShortcut], None]:
+        loop = asyncio.get_running_loop()
+        key = self.target_key(rs)
+        self._sequence += 1
+        pending = _Pending(
+            self.priority(execution),
+            self._sequence,
+            key,
+            self._protocol_of(rs),
+            execution,
+            loop.create_future(),
+            loop.time(),
+        )
+        self.stats.submitted += 1
+        self._enqueue(pending)
+        try:
+            # 在得到结果前被取消时 future 也会被取消, worker 会跳过它
+            yield await pending.future
+        finally:
+            if pending.followers:
+                # leader 没能完成发送 (包括得到结果后, 发送前被取消), 被合并的执行回到队列中
+                lead = pending.future.result().result  # type: ignore
+                if inspect.getcoroutinestate(lead) == inspect.CORO_CREATED:  # type: ignore
+                    lead.close()  # type: ignore
+                self._requeue(pending)
+
+    def _enqueue(self, pending: _Pending) -> None:
+        heapq.heappush(self._queues.setdefault(pending.key, []), pending)
+        if pending.key not in self._workers:
+            self._workers[pending.key] = asyncio.create_task(self._drain(pending.key))
+
+    def _requeue(self, leader: _Pending) -> None:
+        followers, leader.followers = leader.followers, []
+        self.stats.coalesced -= len(followers)
+        for follower in followers:
+            if not follower.future.done():
+                self._enqueue(follower)
+
+    def _coalescible(self, leader: Execution, other: Execution) -> bool:
+        return (
+            isinstance(leader, MessageSend)
+            and type(other) is type(leader)
+            and leader.reply is None
+            and other.reply is None  # type: ignore
+        )
+
+    def _record_wait(self, wait: float) -> None:
+        self.stats.total_wait += wait
+        if wait > self.stats.max_wait:
+            self.stats.max_wait = wait
+
+    async def _drain(self, key: Hashable) -> None:
+        loop = asyncio.get_running_loop()
+        queue = self._queues[key]
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = TokenBucket(self.rate, self.burst)
+        try:
+            while queue:
+                now = time.monotonic()
+                delay = bucket.delay(now)
+                if self.global_bucket is not None:
+                    delay = max(delay, self.global_bucket.delay(now))
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                    continue
+
+                pending = heapq.heappop(queue)
+                if pending.future.done():
+                    continue
+                bucket.consume()
+                if self.global_bucket is not None:
+                    self.global_bucket.consume()
+
+                self.stats.dispatched += 1
+                dispatched = loop.time()
+                self._record_wait(dispatched - pending.enqueued)
+
+                followers: List[_Pending] = []
+                if self.coalesce and isinstance(pending.execution, MessageSend):
+                    remains = []
+                    for other in queue:
+                        if other.future.done():
+                            continue
+                        if self._coalescible(pending.execution, other.execution):
+                            followers.append(other)
+                        else:
+                            remains.append(other)
+                    if followers:
+                        queue[:] = remains
+                        heapq.heapify(queue)
+
+                if not followers:
+                    pending.future.set_result(None)
+                    continue
+
+                followers.sort()
+                leader: MessageSend = pending.execution  # type: ignore
+                chains = [leader.message]
+                for follower in followers:
+                    chains.extend((self.coalesce_separator, follower.execution.message))  # type: ignore
+                # 不修改调用方提交的 MessageSend, 以免重试或记录时带上其他执行的内容
+                merged = leader.copy(update={"message": MessageChain.join(*chains)})  # type: ignore
+
+                # followers 的 future 在发送完成后才会得到结果, 在此之前它们仍可以被单独取消
+                pending.followers = followers
+                pending.future.set_result(ExecutionShortcut(self._lead(pending, merged, dispatched)))
+                self.stats.coalesced += len(followers)
+        finally:
+            del self._workers[key]
+            if not queue:
+                del self._queues[key]
+
+    async def _lead(self, pending: _Pending, execution: Execution, dispatched: float) -> Any:
+        shared: "asyncio.Future[Any]" = asyncio.get_running_loop().create_future()
+        try:
+            result = await pending.protocol.ensure_execution(execution)
+        except asyncio.CancelledError:
+            self._requeue(pending)
+            raise
+        except BaseException as e:
+            shared.set_exception(e)
+            shared.exception()  # 没有 follower 等待时, 不产生 "exception was never retrieved"
+            raise
+        else:
+            shared.set_result(result)
+            return result
+        finally:
+            followers, pending.followers = pending.followers, []
+            for follower in followers:
+                self._record_wait(dispatched - follower.enqueued)
+                if not follower.future.done():
+                    follower.future.set_result(ExecutionShortcut(shared))
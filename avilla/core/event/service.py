@@ -1,30 +1,58 @@
+from typing import TYPE_CHECKING, Optional
+
 from graia.broadcast.entities.dispatcher import BaseDispatcher
 from graia.broadcast.entities.event import Dispatchable
 
+if TYPE_CHECKING:
+    from avilla.core.network.service import Service
+
+
+class _ServiceDispatcher(BaseDispatcher):
+    @staticmethod
+    async def catch(interface):
+        service = interface.event.service
+        if (
+            service is not None
+            and isinstance(interface.annotation, type)
+            and isinstance(service, interface.annotation)
+        ):
+            return service
+
 
 class ServiceOnline(Dispatchable):
+    service: Optional["Service"]
+
+    def __init__(self, service: "Service" = None) -> None:
+        self.service = service
+
     @staticmethod
     def get_ability_id() -> str:
         return "event::ServiceOnline"
 
-    class Dispatcher(BaseDispatcher):
-        @staticmethod
-        async def catch(interface):
-            return
+    Dispatcher = _ServiceDispatcher
 
 
 class ServiceOffline(Dispatchable):
+    service: Optional["Service"]
+
+    def __init__(self, service: "Service" = None) -> None:
+        self.service = service
+
     @staticmethod
     def get_ability_id() -> str:
         return "event::ServiceOffline"
 
-    class Dispatcher(BaseDispatcher):
-        @staticmethod
-        async def catch(interface):
-            return
+    Dispatcher = _ServiceDispatcher
 
 
 class NetworkConnected(Dispatchable):
+    service: Optional["Service"]
+    connection_id: Optional[str]
+
+    def __init__(self, service: "Service" = None, connection_id: str = None) -> None:
+        self.service = service
+        self.connection_id = connection_id
+
     @staticmethod
     def get_ability_id() -> str:
         return "event::NetworkConnected"
@@ -32,4 +60,6 @@ class NetworkConnected(Dispatchable):
     class Dispatcher(BaseDispatcher):
         @staticmethod
         async def catch(interface):
-            return
+            if interface.name == "connection_id":
+                return interface.event.connection_id
+            return await _ServiceDispatcher.catch(interface)
@@ -1,4 +1,6 @@
-from typing import Awaitable, Callable, List, Optional, Set
+import asyncio
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Set
 
 
 class LaunchComponent:
@@ -28,18 +30,173 @@ class RequirementResolveFailed(Exception):
     pass
 
 
+@dataclass
+class LaunchTiming:
+    "单个 LaunchComponent 某一阶段的耗时, 时间均相对于该阶段开始的时刻, 单位为秒."
+
+    component: str
+    started: float
+    finished: float
+    error: Optional[BaseException] = None
+
+    @property
+    def waited(self) -> float:
+        "等待依赖完成所花费的时间."
+        return self.started
+
+    @property
+    def elapsed(self) -> float:
+        return self.finished - self.started
+
+
+def _find_cycle(graph: Dict[str, Set[str]]) -> List[str]:
+    # graph 中只剩下处于环上或依赖环的节点, 从任意节点沿依赖一直走下去必然会回到走过的节点
+    node = next(iter(graph))
+    path: List[str] = []
+    visited: Dict[str, int] = {}
+    while node not in visited:
+        visited[node] = len(path)
+        path.append(node)
+        node = next(iter(graph[node]))
+    return path[visited[node] :] + [node]
+
+
+def build_dependents(components: Iterable[LaunchComponent]) -> Dict[str, Set[str]]:
+    """检查依赖关系, 返回 component id -> 直接依赖它的 component id 的映射.
+
+    存在未知的依赖或循环依赖时抛出 RequirementResolveFailed, 并在信息中给出具体的组件与环.
+    """
+    components = {component.id: component for component in components}
+    dependents: Dict[str, Set[str]] = {component_id: set() for component_id in components}
+    missing: List[str] = []
+    for component in components.values():
+        for required in component.required:
+            if required in dependents:
+                dependents[required].add(component.id)
+            else:
+                missing.append(f"{component.id} -> {required}")
+    if missing:
+        raise RequirementResolveFailed(f"unknown requirements: {', '.join(sorted(missing))}")
+
+    indegree = {component.id: len(component.required) for component in components.values()}
+    ready = [component_id for component_id, degree in indegree.items() if not degree]
+    while ready:
+        component_id = ready.pop()
+        for dependent in dependents[component_id]:
+            indegree[dependent] -= 1
+            if not indegree[dependent]:
+                ready.append(dependent)
+    remaining = {component_id for component_id, degree in indegree.items() if degree}
+    if remaining:
+        graph = {component_id: components[component_id].required & remaining for component_id in remaining}
+        raise RequirementResolveFailed(f"circular requirements: {' -> '.join(_find_cycle(graph))}")
+    return dependents
+
+
 def resolve_requirements(components: Set[LaunchComponent]) -> List[Set[LaunchComponent]]:
-    resolved = set()
+    "将 components 按依赖关系分层, 每一层只依赖于之前的层."
+    dependents = build_dependents(components)
+    by_id = {component.id: component for component in components}
+    indegree = {component.id: len(component.required) for component in components}
+    layer = {component for component in components if not component.required}
     result = []
-    while components:
-        layer = set()
-        for index, component in enumerate(components):
-            if component.required.issubset(resolved):
-                layer.add(component)
-        if layer:
-            components -= layer
-            resolved.update(component.id for component in layer)
-            result.append(layer)
-        else:
-            raise RequirementResolveFailed
+    while layer:
+        result.append(layer)
+        next_layer = set()
+        for component in layer:
+            for dependent in dependents[component.id]:
+                indegree[dependent] -= 1
+                if not indegree[dependent]:
+                    next_layer.add(by_id[dependent])
+        layer = next_layer
     return result
+
+
+async def run_components(
+    components: Iterable[LaunchComponent],
+    stage: Callable[[LaunchComponent], Optional[Callable[[], Awaitable[None]]]],
+    reverse: bool = False,
+    on_finished: Optional[Callable[[LaunchComponent], None]] = None,
+    suppress_exceptions: bool = False,
+) -> Dict[str, LaunchTiming]:
+    """按依赖关系执行 components 的某一阶段 (由 `stage` 取得, 如 `prepare`, `cleanup`).
+
+    每个 component 在其依赖全部完成后立即开始, 而不是等待整层完成; `reverse` 为 True 时反过来,
+    component 要等依赖它的 component 全部完成后才开始 (用于 cleanup).
+    `suppress_exceptions` 为 False 时, 一旦有 component 失败, 会取消其余正在执行的任务, 等待它们结束后抛出第一个异常;
+    为 True 时失败的 component 视为已完成, 其异常记录在对应的 `LaunchTiming.error` 上.
+
+    返回各个 component 的耗时.
+    """
+    components = {component.id: component for component in components}
+    dependents = build_dependents(components.values())
+    if reverse:
+        waiting_on = {component_id: len(dependents[component_id]) for component_id in components}
+        unlocks = {component_id: components[component_id].required for component_id in components}
+    else:
+        waiting_on = {component_id: len(component.required) for component_id, component in components.items()}
+        unlocks = dependents
+
+    loop = asyncio.get_running_loop()
+    started_at = loop.time()
+    timings: Dict[str, LaunchTiming] = {}
+    running: Dict["asyncio.Task[None]", str] = {}
+    # 依赖已经全部完成, 等待开始的 component; 以工作列表代替 start/finish 间的递归, 依赖链再长也不会加深调用栈
+    ready = [component_id for component_id, count in waiting_on.items() if not count]
+
+    def start_ready() -> None:
+        while ready:
+            component_id = ready.pop()
+            action = stage(components[component_id])
+            now = loop.time() - started_at
+            timings[component_id] = LaunchTiming(component_id, now, now)
+            if action is None:
+                finish(component_id)
+            else:
+                running[asyncio.create_task(action(), name=component_id)] = component_id  # type: ignore
+
+    def finish(component_id: str) -> None:
+        timings[component_id].finished = loop.time() - started_at
+        if on_finished is not None:
+            on_finished(components[component_id])
+        for unlocked in unlocks[component_id]:
+            waiting_on[unlocked] -= 1
+            if not waiting_on[unlocked]:
+                ready.append(unlocked)
+
+    error: Optional[BaseException] = None
+    try:
+        start_ready()
+        while running:
+            done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+            # 同一批完成的任务都要取出异常, 以免出现 "Task exception was never retrieved"
+            for task in done:
+                component_id = running.pop(task)
+                task_error = task.exception() if not task.cancelled() else asyncio.CancelledError()
+                if task_error is not None:
+                    timings[component_id].error = task_error
+                    if not suppress_exceptions:
+                        error = error or task_error
+                        continue
+                finish(component_id)
+            if error is not None:
+                break
+            start_ready()
+    finally:
+        # 失败或被取消时, 取消其余的任务并等待它们真正结束, 同时取出它们的异常
+        for task in running:
+            task.cancel()
+        if running:
+            await asyncio.gather(*running, return_exceptions=True)
+    if error is not None:
+        raise error
+    return timings
+
+
+def format_timings(timings: Dict[str, LaunchTiming]) -> str:
+    "按耗时降序排列的耗时报告, 每行一个 component."
+    width = max((len(component_id) for component_id in timings), default=0)
+    return "\n".join(
+        f"{timing.component:<{width}}  {timing.elapsed * 1000:9.2f} ms  (waited {timing.waited * 1000:.2f} ms)"
+        for timing in sorted(timings.values(), key=lambda timing: timing.elapsed, reverse=True)
+    )
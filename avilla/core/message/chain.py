@@ -1,16 +1,16 @@
 from __future__ import annotations
 
 import copy
-from typing import Iterable, List, Optional, Tuple, Type, Union
-
-from pydantic import BaseModel  # pylint: ignore
+import itertools
+import sys
+from typing import Any, Callable, ClassVar, Dict, Iterable, Iterator, List, Optional, Tuple, Type, Union
 
 from .element import Element
 
 MessageIndex = Tuple[int, Optional[int]]
 
 
-class MessageChain(BaseModel):
+class MessageChain:
     """即 "消息链", 被用于承载整个消息内容的数据结构, 包含有一有序列表, 包含有继承了 Element 的各式类实例.
     Example:
         1. 你可以使用 `MessageChain.create` 方法创建一个消息链:
@@ -60,22 +60,104 @@ class MessageChain(BaseModel):
             ])
             message.asMerged()[(0, 12):] # => [At(123), Text("3423")]
             ```
+
+    消息链本身并不是 pydantic 模型, 校验只发生在边界上(`MessageChain.create` 与作为 pydantic 模型字段时),
+    内部的各种切分/合并操作均通过 `MessageChain._trusted` 直接构造, 不再重复校验.
+
+    `has`, `get`, `get_one` 与 `get_first` 会使用一个惰性构建并缓存的元素类型索引(类型 -> 位置),
+    该索引在 `plus` 时失效; 若直接修改了 `__root__`, 需要手动调用 `MessageChain.invalidate`.
+    `as_display` 的结果同样会被缓存, 并在 `plus` 时增量更新.
+    `LiteratureRouter` 的路由结果也缓存在消息链上, 与索引同样在 `plus` 与 `invalidate` 时失效.
     """
 
+    __slots__ = ("__root__", "_type_index", "_display", "_route")
+
+    # 长度不超过该值的 as_display 结果会被 sys.intern, 用于复用指令, 表情等大量重复的短文本; 为 0 时关闭.
+    display_intern_limit: ClassVar[int] = 0
+
     __root__: List[Element]
+    _type_index: Optional[Dict[Type[Element], List[int]]]
+    _display: Optional[str]
+    _route: Optional[Tuple[object, Any]]  # (LiteratureRouter 的当前版本, 路由结果)
+
+    def __init__(self, __root__: Iterable[Element]) -> None:
+        self.__root__ = self._validate_elements(__root__)
+        self._type_index = None
+        self._display = None
+        self._route = None
+
+    @staticmethod
+    def _validate_elements(elements: Iterable[Element]) -> List[Element]:
+        result = list(elements)
+        for element in result:
+            if not isinstance(element, Element):
+                raise TypeError(f"{element!r} is not a message element")
+        return result
 
-    class Config:
-        arbitrary_types_allowed = True
+    @classmethod
+    def _trusted(cls, elements: List[Element]) -> "MessageChain":
+        """内部使用的构造方法, 直接接管传入的列表, 不进行任何校验与复制.
+        调用方需要保证列表中只有消息元素, 且之后不再被其他地方修改.
+        """
+        chain = cls.__new__(cls)
+        chain.__root__ = elements
+        chain._type_index = None
+        chain._display = None
+        chain._route = None
+        return chain
+
+    def invalidate(self) -> None:
+        """丢弃消息链上缓存的索引, 显示文本与路由结果, 在直接修改 `__root__` 后调用."""
+        self._type_index = None
+        self._display = None
+        self._route = None
+
+    def _get_type_index(self) -> Dict[Type[Element], List[int]]:
+        index = self._type_index
+        if index is None:
+            index = {}
+            for position, element in enumerate(self.__root__):
+                positions = index.get(element.__class__)
+                if positions is None:
+                    index[element.__class__] = [position]
+                else:
+                    positions.append(position)
+            self._type_index = index
+        return index
+
+    def _positions(self, element_class: Union[Type[Element], Tuple[Type[Element], ...]]) -> List[int]:
+        """按 `isinstance` 语义获取符合类型的元素位置, 结果按位置升序排列."""
+        matched = [
+            positions
+            for klass, positions in self._get_type_index().items()
+            if issubclass(klass, element_class)
+        ]
+        if len(matched) == 1:
+            return matched[0]
+        return sorted(position for positions in matched for position in positions)
 
     @classmethod
-    def create(cls, elements: List[Element]) -> "MessageChain":
+    def create(cls, elements: Iterable[Element]) -> "MessageChain":
         """从传入的序列(可以是元组 tuple, 也可以是列表 list) 创建消息链.
         Args:
             elements (List[T]): 包含且仅包含消息元素的序列
         Returns:
             MessageChain: 以传入的序列作为所承载消息的消息链
         """
-        return cls(__root__=elements)
+        return cls(elements)
+
+    @classmethod
+    def __get_validators__(cls) -> Iterator[Callable[[Any], "MessageChain"]]:
+        yield cls.validate
+
+    @classmethod
+    def validate(cls, value: Any) -> "MessageChain":
+        """作为 pydantic 模型字段时的校验入口."""
+        if isinstance(value, MessageChain):
+            return value
+        if isinstance(value, (list, tuple)):
+            return cls.create(value)
+        raise TypeError(f"{type(value)} cannot be converted to MessageChain")
 
     def has(self, element_class: Element) -> bool:
         """判断消息链中是否含有特定类型的消息元素
@@ -84,7 +166,7 @@ class MessageChain(BaseModel):
         Returns:
             bool: 判断结果
         """
-        return element_class in [type(i) for i in self.__root__]
+        return element_class in self._get_type_index()
 
     def get(self, element_class: Type[Element]) -> List[Element]:
         """获取消息链中所有特定类型的消息元素
@@ -93,7 +175,8 @@ class MessageChain(BaseModel):
         Returns:
             List[T]: 获取到的符合要求的所有消息元素; 另: 可能是空列表([]).
         """
-        return [i for i in self.__root__ if type(i) is element_class]
+        root = self.__root__
+        return [root[i] for i in self._get_type_index().get(element_class, ())]
 
     def get_one(self, element_class: Type[Element], index: int) -> Element:
         """获取消息链中第 index + 1 个特定类型的消息元素
@@ -103,7 +186,10 @@ class MessageChain(BaseModel):
         Returns:
             T: 消息链第 index + 1 个特定类型的消息元素
         """
-        return self.get(element_class)[index]
+        positions = self._get_type_index().get(element_class)
+        if positions is None:
+            raise IndexError("list index out of range")
+        return self.__root__[positions[index]]
 
     def get_first(self, element_class: Type[Element]) -> Element:
         """获取消息链中第 1 个特定类型的消息元素
@@ -119,7 +205,16 @@ class MessageChain(BaseModel):
         Returns:
             str: 以字符串形式表示的消息链
         """
-        return "".join(i.asDisplay() for i in self.__root__)
+        display = self._display
+        if display is None:
+            display = self._display = self._intern_display("".join(i.asDisplay() for i in self))
+        return display
+
+    @classmethod
+    def _intern_display(cls, display: str) -> str:
+        if len(display) <= cls.display_intern_limit:
+            return sys.intern(display)
+        return display
 
     @classmethod
     def join(cls, *chains: "MessageChain") -> "MessageChain":
@@ -127,14 +222,14 @@ class MessageChain(BaseModel):
         Returns:
             MessageChain: 拼接结果
         """
-        return cls.create(sum([list(i.__root__) for i in chains], []))
+        return cls._trusted([element for chain in chains for element in chain.__root__])
 
     def plus_with(self, *chains: "MessageChain") -> "MessageChain":
         """在现有的基础上将另一消息链拼接到原来实例的尾部, 并生成, 返回新的实例.
         Returns:
             MessageChain: 拼接结果
         """
-        return self.create(sum([list(i.__root__) for i in chains], self.__root__))
+        return self._trusted([element for chain in (self, *chains) for element in chain.__root__])
 
     def plus(self, *chains: "MessageChain") -> None:
         """在现有的基础上将另一消息链拼接到原来实例的尾部
@@ -143,11 +238,26 @@ class MessageChain(BaseModel):
         Returns:
             None: 本方法无返回.
         """
+        display = self._display
         for i in chains:
-            self.__root__.extend(list(i.__root__))
+            if display is not None:
+                display += i.as_display()
+            self.__root__.extend(i.__root__)
+        self._type_index = None
+        self._route = None
+        if display is not None:
+            display = self._intern_display(display)
+        self._display = display
 
     __contains__ = has
 
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, MessageChain):
+            return NotImplemented
+        return self.__root__ == other.__root__
+
+    __hash__ = None  # type: ignore
+
     def __getitem__(self, item: Union[Type[Element], slice]):
         if isinstance(item, slice):
             return self.subchain(item)
@@ -198,7 +308,7 @@ class MessageChain(BaseModel):
                 ]
             else:
                 result = first_slice
-        return MessageChain.create(result)
+        return MessageChain._trusted(result)
 
     def as_merged(self) -> "MessageChain":
         """合并相邻的 Text 项, 并返回一个新的消息链实例
@@ -222,7 +332,7 @@ class MessageChain(BaseModel):
             if texts:
                 result.append(Text("".join(texts)))
                 texts.clear()  # 清空缓存
-        return MessageChain.create(type(self.__root__)(result))  # 维持 Mutable
+        return MessageChain._trusted(result)
 
     def exclude(self, *types: Type[Element]) -> MessageChain:
         """将除了在给出的消息元素类型中符合的消息元素重新包装为一个新的消息链
@@ -231,7 +341,7 @@ class MessageChain(BaseModel):
         Returns:
             MessageChain: 返回的消息链中不包含参数中给出的消息元素类型
         """
-        return self.create([i for i in self.__root__ if type(i) not in types])
+        return self._trusted([i for i in self.__root__ if type(i) not in types])
 
     def include(self, *types: Type[Element]) -> MessageChain:
         """将只在给出的消息元素类型中符合的消息元素重新包装为一个新的消息链
@@ -240,39 +350,54 @@ class MessageChain(BaseModel):
         Returns:
             MessageChain: 返回的消息链中只包含参数中给出的消息元素类型
         """
-        return self.create([i for i in self.__root__ if type(i) in types])
+        return self._trusted([i for i in self.__root__ if type(i) in types])
 
-    def split(self, pattern: str, raw_string: bool = False) -> List["MessageChain"]:
-        """和 `str.split` 差不多, 提供一个字符串, 然后返回分割结果.
+    def iter_split(self, pattern: str, raw_string: bool = False) -> Iterator["MessageChain"]:
+        """`split` 的惰性版本, 按需逐个生成分割得到的片段, 适用于只关心开头几个片段的场合.
         Returns:
-            List["MessageChain"]: 分割结果, 行为和 `str.split` 差不多.
+            Iterator["MessageChain"]: 依次生成的分割结果.
         """
         from ..builtins.elements import Text
 
-        result: List["MessageChain"] = []
         tmp = []
-        for element in self.__root__:
+        for element in self:
             if isinstance(element, Text):
                 split_result = element.text.split(pattern)
                 for index, split_str in enumerate(split_result):
                     if tmp and index > 0:
-                        result.append(MessageChain.create(tmp))
+                        yield MessageChain._trusted(tmp)
                         tmp = []
                     if split_str or raw_string:
                         tmp.append(Text(split_str))
             else:
                 tmp.append(element)
-        else:
-            if tmp:
-                result.append(MessageChain.create(tmp))
-                tmp = []
-        return result
+        if tmp:
+            yield MessageChain._trusted(tmp)
+
+    def split(self, pattern: str, raw_string: bool = False) -> List["MessageChain"]:
+        """和 `str.split` 差不多, 提供一个字符串, 然后返回分割结果.
+        Returns:
+            List["MessageChain"]: 分割结果, 行为和 `str.split` 差不多.
+        """
+        return list(self.iter_split(pattern, raw_string))
+
+    def subchain_view(self, item: slice, ignore_text_index: bool = False) -> "MessageChainView":
+        """与 `subchain` 相同的分片操作, 但返回一个与原消息链共享元素存储的视图.
+        视图只记录起止位置与首尾 Text 的偏移, 在需要列表形式(`__root__`)或被修改时才会实际构建元素列表.
+        Args:
+            item (slice): 这个分片的 `start` 和 `end` 的 Type Annotation 都是 `Optional[MessageIndex]`
+        Raises:
+            TypeError: TextIndex 取到了错误的位置
+        Returns:
+            MessageChainView: 分片得到的视图
+        """
+        return MessageChainView(self, item, ignore_text_index)
 
     def __repr__(self) -> str:
         return f"MessageChain({repr(self.__root__)})"
 
-    def __iter__(self) -> Iterable[Element]:
-        yield from self.__root__
+    def __iter__(self) -> Iterator[Element]:
+        return iter(self.__root__)
 
     def startswith(self, string: str) -> bool:
         from ..builtins.elements import Text
@@ -287,3 +412,130 @@ class MessageChain(BaseModel):
         if not self.__root__ or type(self.__root__[-1]) is not Text:
             return False
         return self.__root__[-1].text.endswith(string)  # type: ignore
+
+
+_root_slot = MessageChain.__dict__["__root__"]
+
+
+class MessageChainView(MessageChain):
+    """由 `MessageChain.subchain_view` 创建的只读视图, 与原消息链共享同一个元素列表.
+
+    迭代, `iter_split`, `startswith` 与 `endswith` 直接作用于原列表的窗口上;
+    访问 `__root__` 时才会构建窗口内的元素列表, 此后视图与原消息链脱离, 可以正常修改.
+    """
+
+    __slots__ = ("_source", "_start", "_stop", "_head", "_tail")
+
+    _source: List[Element]
+    _start: int
+    _stop: int
+    _head: Optional[int]  # 首个元素(Text)的起始偏移
+    _tail: Optional[int]  # 末个元素(Text)的结束偏移
+
+    def __init__(self, chain: MessageChain, item: slice, ignore_text_index: bool = False) -> None:
+        from ..builtins.elements import Text
+
+        root = chain.__root__
+        start, stop = 0, len(root)
+        head = tail = None
+        if item.start:
+            start = slice(item.start[0], None).indices(stop)[0]
+            if item.start[1] is not None and start < stop:  # text slice
+                first = root[start]
+                if not isinstance(first, Text):
+                    if not ignore_text_index:
+                        raise TypeError("the sliced chain does not starts with a Text: {}".format(first))
+                elif first.text[item.start[1] :]:
+                    head = item.start[1]
+                else:
+                    start += 1
+        if item.stop:
+            stop = start + slice(None, item.stop[0]).indices(stop - start)[1]
+            if item.stop[1] is not None and start < stop:  # text slice
+                last = root[stop - 1]
+                if not isinstance(last, Text):
+                    raise TypeError("the sliced chain does not ends with a Text: {}".format(last))
+                text = last.text[head:] if head is not None and stop - 1 == start else last.text
+                if text[: item.stop[1]]:
+                    tail = item.stop[1]
+                else:
+                    stop -= 1
+        self._source = root
+        self._start = start
+        self._stop = stop
+        self._head = head
+        self._tail = tail
+        self._type_index = None
+        self._display = None
+        self._route = None
+
+    @classmethod
+    def _trusted(cls, elements: List[Element]) -> MessageChain:
+        return MessageChain._trusted(elements)
+
+    @property
+    def __root__(self) -> List[Element]:  # type: ignore
+        try:
+            return _root_slot.__get__(self)
+        except AttributeError:
+            elements = list(self._iter_window())
+            _root_slot.__set__(self, elements)
+            return elements
+
+    @__root__.setter
+    def __root__(self, value: List[Element]) -> None:
+        _root_slot.__set__(self, value)
+
+    @property
+    def materialized(self) -> bool:
+        try:
+            _root_slot.__get__(self)
+        except AttributeError:
+            return False
+        return True
+
+    def _element_at(self, position: int) -> Element:
+        from ..builtins.elements import Text
+
+        element = self._source[position]
+        if position == self._start and self._head is not None:
+            element = Text(element.text[self._head :])  # type: ignore
+        if position == self._stop - 1 and self._tail is not None:
+            element = Text(element.text[: self._tail])  # type: ignore
+        return element
+
+    def _iter_window(self) -> Iterator[Element]:
+        source = self._source
+        start, stop = self._start, self._stop
+        if start >= stop:
+            return
+        yield self._element_at(start)
+        if stop - start > 2:
+            yield from itertools.islice(source, start + 1, stop - 1)
+        if stop - start > 1:
+            yield self._element_at(stop - 1)
+
+    def __iter__(self) -> Iterator[Element]:
+        if self.materialized:
+            return iter(_root_slot.__get__(self))
+        return self._iter_window()
+
+    def startswith(self, string: str) -> bool:
+        from ..builtins.elements import Text
+
+        if self.materialized:
+            return super().startswith(string)
+        if self._start >= self._stop:
+            return False
+        first = self._element_at(self._start)
+        return type(first) is Text and first.text.startswith(string)  # type: ignore
+
+    def endswith(self, string: str) -> bool:
+        from ..builtins.elements import Text
+
+        if self.materialized:
+            return super().endswith(string)
+        if self._start >= self._stop:
+            return False
+        last = self._element_at(self._stop - 1)
+        return type(last) is Text and last.text.endswith(string)  # type: ignore
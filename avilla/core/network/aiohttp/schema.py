@@ -1,4 +1,4 @@
-from typing import Dict, Literal
+from typing import Dict, Literal, Tuple
 
 from yarl import URL
 
@@ -27,3 +27,23 @@ class HttpRequestSchema(Schema):
         self.method = method
         self.data = data
         self.headers = headers or {}
+
+
+class HttpServerSchema(Schema):
+    pattern = "$server"
+    path: str
+    methods: Tuple[str, ...]
+
+    def __init__(self, path: str, methods: Tuple[str, ...] = ("POST",)):
+        self.path = path
+        self.methods = tuple(method.upper() for method in methods)
+
+
+class WebsocketClientSchema(Schema):
+    pattern = "$websocket"
+    url: URL
+    headers: Dict[str, str]
+
+    def __init__(self, url: URL, headers: Dict[str, str] = None):
+        self.url = url
+        self.headers = headers or {}
@@ -0,0 +1,272 @@
+import asyncio
+import time
+from dataclasses import dataclass
+from functools import cached_property
+from typing import TYPE_CHECKING, Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple, Type
+
+from avilla.core.launch import LaunchComponent
+from avilla.core.network.activity import Activity
+from avilla.core.network.aiohttp.schema import HttpServerSchema
+from avilla.core.network.builtins.activities import SetCookie, SetHeader, SetStatusCode, Write, WriteText
+from avilla.core.network.builtins.partitions import GetCookie, GetHeader, Read, ReadChunks, ReadInto
+from avilla.core.network.endpoint import Endpoint
+from avilla.core.network.partition import PartitionSymbol
+from avilla.core.network.service import PolicyProtocol, Service, ServiceId
+from avilla.core.utilles.metrics import LatencyHistogram
+
+if TYPE_CHECKING:
+    from aiohttp import web
+
+    from avilla.core.network.policy import Policy
+
+# 服务端调用 policy 上的该方法处理请求: `async def on_request(self, protocol: PolicyProtocol) -> None`
+REQUEST_POLICY = "on_request"
+
+
+@dataclass
+class ServerStats:
+    accepted: int = 0
+    rejected: int = 0  # 因超出 max_inflight 被直接以 429 拒绝的数量
+    failed: int = 0  # policy 抛出异常, 以 500 响应的数量
+    inflight: int = 0
+    peak_inflight: int = 0
+
+
+class AiohttpRequestPolicyProtocol(PolicyProtocol):
+    """包装单个 aiohttp 请求的 PolicyProtocol, policy 通过 partition 读取请求, 通过 activity 构造响应.
+
+    处理函数表在类上预先构建, 每个请求只需要创建这一个对象.
+    """
+
+    request: "web.BaseRequest"
+    status: int
+    headers: Dict[str, str]
+    cookies: Dict[str, str]
+    body: List[bytes]
+
+    _partition_table: "Dict[Type[PartitionSymbol], Callable[[AiohttpRequestPolicyProtocol, Any], Awaitable]]"
+    _activity_table: "Dict[Type[Activity], Callable[[AiohttpRequestPolicyProtocol, Any], Awaitable]]"
+
+    def __init__(self, endpoint: Endpoint, request: "web.BaseRequest") -> None:
+        self.endpoint = endpoint
+        self.request = request
+        self.status = 200
+        self.headers = {}
+        self.cookies = {}
+        self.body = []
+
+    @cached_property
+    def partition_handlers(self) -> Dict:  # type: ignore
+        return {
+            partition_type: (lambda partition, handler=handler: handler(self, partition))
+            for partition_type, handler in self._partition_table.items()
+        }
+
+    @cached_property
+    def activity_handlers(self) -> Dict:  # type: ignore
+        return {
+            activity_type: (lambda activity, handler=handler: handler(self, activity))
+            for activity_type, handler in self._activity_table.items()
+        }
+
+    async def partition(self, partition):
+        handler = self._partition_table.get(partition.__class__)
+        if handler is None:
+            raise TypeError(f"No handler for {partition}")
+        return await handler(self, partition)
+
+    async def apply(self, *activities) -> None:
+        for activity in activities:
+            activity_class = type(activity) if isinstance(activity, Activity) else activity
+            handler = self._activity_table.get(activity_class)
+            if handler is None:
+                raise TypeError(f"No handler for {activity_class}")
+            await handler(self, activity)
+
+    async def _read(self, partition: Read) -> bytes:
+        return await self.request.read()
+
+    async def _read_chunks(self, partition: ReadChunks) -> AsyncIterator[bytes]:
+        return self.request.content.iter_chunked(partition.chunk_size)
+
+    async def _read_into(self, partition: ReadInto) -> int:
+        data = await self.request.content.read(len(partition.buffer))
+        partition.buffer[: len(data)] = data
+        return len(data)
+
+    async def _get_header(self, partition: GetHeader) -> Optional[str]:
+        return self.request.headers.get(partition.key)
+
+    async def _get_cookie(self, partition: GetCookie) -> Optional[str]:
+        return self.request.cookies.get(partition.key)
+
+    async def _write(self, activity: Write) -> None:
+        self.body.append(activity.content)
+
+    async def _write_text(self, activity: WriteText) -> None:
+        self.body.append(activity.content.encode())
+
+    async def _set_header(self, activity: SetHeader) -> None:
+        self.headers[activity.header] = activity.value
+
+    async def _set_cookie(self, activity: SetCookie) -> None:
+        self.cookies[activity.key] = activity.value
+
+    async def _set_status_code(self, activity: SetStatusCode) -> None:
+        self.status = activity.status
+
+    def build_response(self) -> "web.Response":
+        from aiohttp import web
+
+        response = web.Response(status=self.status, headers=self.headers, body=b"".join(self.body))
+        for key, value in self.cookies.items():
+            response.set_cookie(key, value)
+        return response
+
+
+AiohttpRequestPolicyProtocol._partition_table = {
+    Read: AiohttpRequestPolicyProtocol._read,
+    ReadChunks: AiohttpRequestPolicyProtocol._read_chunks,
+    ReadInto: AiohttpRequestPolicyProtocol._read_into,
+    GetHeader: AiohttpRequestPolicyProtocol._get_header,
+    GetCookie: AiohttpRequestPolicyProtocol._get_cookie,
+}
+AiohttpRequestPolicyProtocol._activity_table = {
+    Write: AiohttpRequestPolicyProtocol._write,
+    WriteText: AiohttpRequestPolicyProtocol._write_text,
+    SetHeader: AiohttpRequestPolicyProtocol._set_header,
+    SetCookie: AiohttpRequestPolicyProtocol._set_cookie,
+    SetStatusCode: AiohttpRequestPolicyProtocol._set_status_code,
+}
+
+
+class AiohttpHttpServer(Service[HttpServerSchema, "Policy"]):
+    """基于 aiohttp 的 HTTP 服务端, 用于接收以 webhook 形式推送的事件.
+
+    通过 `register_endpoint(HttpServerSchema(path, methods), policy)` 注册的 policy 会以
+    `AiohttpRequestPolicyProtocol` 调用其 `on_request` 方法. 同时处理中的请求数达到 `max_inflight` 时,
+    新的请求会立即得到 429 响应 (附带 Retry-After), 而不是在服务端排队.
+    """
+
+    id = ServiceId("org.graia", "avilla.core", "http", "server")
+    host: str
+    port: int
+    max_inflight: int
+    client_max_size: int
+    retry_after: int
+    stats: ServerStats
+    latency: Dict[str, LatencyHistogram]  # path -> 处理请求的耗时
+
+    _routes: Dict[str, Tuple[Endpoint, Tuple[str, ...]]]
+    _runner: Optional["web.AppRunner"]
+    _stopped: Optional[asyncio.Event]
+
+    def __init__(
+        self,
+        host: str = "0.0.0.0",
+        port: int = 8080,
+        max_inflight: int = 1024,
+        client_max_size: int = 1024 * 1024,
+        retry_after: int = 1,
+    ) -> None:
+        self.host = host
+        self.port = port
+        self.max_inflight = max_inflight
+        self.client_max_size = client_max_size
+        self.retry_after = retry_after
+        self.stats = ServerStats()
+        self.latency = {}
+        self._routes = {}
+        self._runner = None
+        self._stopped = None
+        super().__init__()
+
+    @property
+    def launch_component(self) -> LaunchComponent:
+        return LaunchComponent(
+            self.id.avilla_uri,
+            set(),
+            self.launch_mainline,
+            self.launch_prepare,
+            self.launch_cleanup,
+        )
+
+    def create_connection_obj(self) -> str:
+        return super().create_connection_obj()
+
+    def destroy_connection_obj(self, connection_id: str) -> None:
+        return super().destroy_connection_obj(connection_id)
+
+    def register_endpoint(
+        self, schema: HttpServerSchema, policy: "Policy"
+    ) -> Endpoint[HttpServerSchema, Any]:
+        endpoint = super().register_endpoint(schema, policy)
+        self._routes[schema.path] = (endpoint, schema.methods)
+        self.latency.setdefault(schema.path, LatencyHistogram())
+        return endpoint
+
+    def remove_endpoint(self, endpoint: Endpoint[HttpServerSchema, Any]) -> None:
+        super().remove_endpoint(endpoint)
+        self._routes.pop(endpoint.metadata.path, None)
+
+    async def _handle(self, request: "web.BaseRequest") -> "web.StreamResponse":
+        from aiohttp import web
+
+        route = self._routes.get(request.path)
+        if route is None:
+            return web.Response(status=404)
+        endpoint, methods = route
+        if request.method not in methods:
+            return web.Response(status=405, headers={"Allow": ", ".join(methods)})
+
+        stats = self.stats
+        if stats.inflight >= self.max_inflight:
+            stats.rejected += 1
+            return web.Response(status=429, headers={"Retry-After": str(self.retry_after)})
+
+        stats.accepted += 1
+        stats.inflight += 1
+        if stats.inflight > stats.peak_inflight:
+            stats.peak_inflight = stats.inflight
+        # endpoint 可能在处理过程中被移除, 先取得直方图
+        histogram = self.latency.get(request.path)
+        start = time.perf_counter()
+        protocol = AiohttpRequestPolicyProtocol(endpoint, request)
+        try:
+            await getattr(endpoint.policy, REQUEST_POLICY)(protocol)
+        except Exception:
+            from loguru import logger
+
+            stats.failed += 1
+            logger.exception(f"error occurred while handling {request.method} {request.path}")
+            return web.Response(status=500)
+        finally:
+            stats.inflight -= 1
+            if histogram is not None:
+                histogram.observe(time.perf_counter() - start)
+        return protocol.build_response()
+
+    async def launch_prepare(self):
+        from aiohttp import web
+
+        self._stopped = asyncio.Event()
+        # 路由由 _routes 自行查找, 以便在启动后仍然可以注册/移除 endpoint
+        app = web.Application(client_max_size=self.client_max_size)
+        app.router.add_route("*", "/{tail:.*}", self._handle)
+        self._runner = web.AppRunner(app, handle_signals=False)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port, backlog=max(128, self.max_inflight)).start()
+
+    async def launch_mainline(self):
+        if self._stopped is not None:
+            await self._stopped.wait()
+
+    def stop(self) -> None:
+        "结束 launch_mainline, 之后由 Avilla 进行 cleanup."
+        if self._stopped is not None:
+            self._stopped.set()
+
+    async def launch_cleanup(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
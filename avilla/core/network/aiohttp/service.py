@@ -1,13 +1,32 @@
+import asyncio
+import random
+import time
 from contextlib import asynccontextmanager
-from typing import Any, AsyncGenerator
-
-from aiohttp import ClientSession
+from dataclasses import dataclass
+from functools import cached_property
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    AsyncGenerator,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    Optional,
+    Tuple,
+    Type,
+)
 
 from avilla.core.launch import LaunchComponent
 from avilla.core.network.aiohttp.schema import ClientSchema, HttpRequestSchema
-from avilla.core.network.builtins.partitions import GetCookie, GetHeader, Read
+from avilla.core.network.builtins.partitions import GetCookie, GetHeader, Read, ReadChunks, ReadInto
 from avilla.core.network.endpoint import Endpoint
+from avilla.core.network.partition import PartitionSymbol
 from avilla.core.network.service import PolicyProtocol, Service, ServiceId
+from avilla.core.utilles.metrics import LatencyHistogram
+
+if TYPE_CHECKING:
+    from aiohttp import ClientResponse, ClientSession
 
 
 def as_async(func):
@@ -17,14 +36,135 @@ def as_async(func):
     return wrapper
 
 
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+
+
+@dataclass
+class AiohttpClientConfig:
+    "AiohttpHttpClient 创建 ClientSession 时使用的连接池, 超时与重试配置; 传入了现成的 session 时只有重试配置生效."
+
+    limit: int = 100
+    limit_per_host: int = 0  # 0 为不限制
+    keepalive_timeout: float = 15.0
+    use_dns_cache: bool = True
+    ttl_dns_cache: Optional[int] = 10
+    total_timeout: Optional[float] = 300.0
+    connect_timeout: Optional[float] = None
+
+    retries: int = 0  # 仅对幂等方法 (IDEMPOTENT_METHODS) 生效
+    retry_backoff: float = 0.5
+    retry_max_backoff: float = 8.0
+    retry_statuses: Tuple[int, ...] = (502, 503, 504)
+
+    # 延迟统计的分组方式, 默认为 "METHOD url(不含 query)"; URL 中带有参数时应映射到路径模板或 API 名称
+    latency_key: Optional[Callable[[HttpRequestSchema], str]] = None
+    max_latency_keys: int = 256  # 超出后新的分组都计入 "METHOD *"
+
+    def backoff(self, attempt: int) -> float:
+        "第 attempt 次 (从 0 开始) 失败后等待的时间, 指数退避并加入抖动."
+        return random.uniform(0, min(self.retry_max_backoff, self.retry_backoff * 2**attempt))
+
+
+class AiohttpResponsePolicyProtocol(PolicyProtocol):
+    """包装单个 aiohttp 响应的 PolicyProtocol.
+
+    处理函数表在类上预先构建, 每次请求只需要创建这一个对象; `endpoint` 在被访问时才会创建.
+    """
+
+    schema: HttpRequestSchema
+    response: "ClientResponse"
+
+    _endpoint: Optional[Endpoint]
+
+    _partition_table: "Dict[Type[PartitionSymbol], Callable[[AiohttpResponsePolicyProtocol, Any], Awaitable]]"
+
+    def __init__(self, schema: HttpRequestSchema, response: "ClientResponse") -> None:
+        self.schema = schema
+        self.response = response
+        self._endpoint = None
+
+    @property
+    def endpoint(self) -> Endpoint:  # type: ignore
+        if self._endpoint is None:
+            self._endpoint = Endpoint(None, self.schema)  # type: ignore
+        return self._endpoint
+
+    @cached_property
+    def partition_handlers(self) -> Dict:  # type: ignore
+        return {
+            partition_type: (lambda partition, handler=handler: handler(self, partition))
+            for partition_type, handler in self._partition_table.items()
+        }
+
+    @cached_property
+    def activity_handlers(self) -> Dict:  # type: ignore
+        return {}
+
+    async def _read(self, partition: Read) -> bytes:
+        return await self.response.read()
+
+    async def _read_chunks(self, partition: ReadChunks) -> AsyncIterator[bytes]:
+        return self.response.content.iter_chunked(partition.chunk_size)
+
+    async def _read_into(self, partition: ReadInto) -> int:
+        data = await self.response.content.read(len(partition.buffer))
+        partition.buffer[: len(data)] = data
+        return len(data)
+
+    async def _get_header(self, partition: GetHeader) -> Optional[str]:
+        return self.response.headers.get(partition.key)
+
+    async def _get_cookie(self, partition: GetCookie):
+        return self.response.cookies.get(partition.key)
+
+    async def partition(self, partition):
+        handler = self._partition_table.get(partition.__class__)
+        if handler is None:
+            raise TypeError(f"No handler for {partition}")
+        return await handler(self, partition)
+
+
+AiohttpResponsePolicyProtocol._partition_table = {
+    Read: AiohttpResponsePolicyProtocol._read,
+    ReadChunks: AiohttpResponsePolicyProtocol._read_chunks,
+    ReadInto: AiohttpResponsePolicyProtocol._read_into,
+    GetHeader: AiohttpResponsePolicyProtocol._get_header,
+    GetCookie: AiohttpResponsePolicyProtocol._get_cookie,
+}
+
+
 class AiohttpHttpClient(Service[ClientSchema, Any]):
     id = ServiceId("org.graia", "avilla.core", "http", "client")
-    _aiohttp_session: ClientSession
+    config: AiohttpClientConfig
+    latency: Dict[str, LatencyHistogram]  # 分组 (见 AiohttpClientConfig.latency_key) -> 到收到响应头为止的延迟
 
-    def __init__(self, session: ClientSession = None) -> None:
-        self._aiohttp_session = session or ClientSession()
+    _aiohttp_session: Optional["ClientSession"]
+
+    def __init__(self, session: "ClientSession" = None, config: AiohttpClientConfig = None) -> None:
+        self._aiohttp_session = session
+        self.config = config or AiohttpClientConfig()
+        self.latency = {}
         super().__init__()
 
+    @property
+    def session(self) -> "ClientSession":
+        "第一次使用时才导入 aiohttp 并按 `config` 创建 ClientSession."
+        if self._aiohttp_session is None:
+            from aiohttp import ClientSession, ClientTimeout, TCPConnector
+
+            config = self.config
+            self._aiohttp_session = ClientSession(
+                connector=TCPConnector(
+                    limit=config.limit,
+                    limit_per_host=config.limit_per_host,
+                    keepalive_timeout=config.keepalive_timeout,
+                    use_dns_cache=config.use_dns_cache,
+                    ttl_dns_cache=config.ttl_dns_cache,
+                ),
+                timeout=ClientTimeout(total=config.total_timeout, connect=config.connect_timeout),
+            )
+        return self._aiohttp_session
+
     @property
     def launch_component(self) -> LaunchComponent:
         return LaunchComponent(
@@ -48,23 +188,53 @@ class AiohttpHttpClient(Service[ClientSchema, Any]):
         return super().remove_endpoint(endpoint)
 
     async def launch_cleanup(self):
-        await self._aiohttp_session.close()
+        if self._aiohttp_session is not None:
+            await self._aiohttp_session.close()
+
+    def _histogram(self, schema: HttpRequestSchema) -> LatencyHistogram:
+        config = self.config
+        if config.latency_key is not None:
+            key = config.latency_key(schema)
+        else:
+            key = f"{schema.method} {str(schema.url).split('?', 1)[0]}"
+        histogram = self.latency.get(key)
+        if histogram is None:
+            if len(self.latency) >= config.max_latency_keys:
+                key = f"{schema.method} *"
+                histogram = self.latency.get(key)
+            if histogram is None:
+                histogram = self.latency[key] = LatencyHistogram()
+        return histogram
+
+    async def _request(self, schema: HttpRequestSchema) -> "ClientResponse":
+        from aiohttp import ClientConnectionError
+
+        config = self.config
+        histogram = self._histogram(schema)
+        attempts = config.retries + 1 if schema.method in IDEMPOTENT_METHODS else 1
+        for attempt in range(attempts):
+            start = time.perf_counter()
+            try:
+                response = await self.session.request(
+                    schema.method,
+                    schema.url,
+                    headers=schema.headers,
+                    data=schema.data,
+                )
+            except (ClientConnectionError, asyncio.TimeoutError):
+                histogram.errors += 1
+                if attempt + 1 == attempts:
+                    raise
+            else:
+                histogram.observe(time.perf_counter() - start)
+                if attempt + 1 == attempts or response.status not in config.retry_statuses:
+                    return response
+                response.release()
+            await asyncio.sleep(config.backoff(attempt))
+        raise RuntimeError("unreachable")
 
     @asynccontextmanager
     async def postconnect(self, schema: HttpRequestSchema) -> AsyncGenerator[PolicyProtocol, None]:
         if isinstance(schema, HttpRequestSchema):
-            async with self._aiohttp_session.request(
-                schema.method,
-                schema.url,
-                headers=schema.headers,
-                data=schema.data,
-            ) as response:
-                yield PolicyProtocol(
-                    Endpoint(None, schema),  # type: ignore
-                    partition_handlers={
-                        Read: lambda x: response.read(),
-                        GetHeader: as_async(lambda x: response.headers.get(x.key)),
-                        GetCookie: as_async(lambda x: response.cookies.get(x.key)),
-                    },
-                    activity_handlers={},
-                )
+            async with await self._request(schema) as response:
+                yield AiohttpResponsePolicyProtocol(schema, response)
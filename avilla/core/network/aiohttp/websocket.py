@@ -0,0 +1,264 @@
+import asyncio
+import random
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Callable, Dict, Optional, Union
+
+from avilla.core.launch import LaunchComponent
+from avilla.core.network.aiohttp.schema import WebsocketClientSchema
+from avilla.core.network.builtins.activities import Write, WriteText
+from avilla.core.network.endpoint import Endpoint
+from avilla.core.network.service import PolicyProtocol, Service, ServiceId
+from avilla.core.transformers.codec import get_codec
+
+if TYPE_CHECKING:
+    from aiohttp import ClientSession, ClientWebSocketResponse
+    from graia.broadcast.entities.event import Dispatchable
+
+    from avilla.core.network.policy import Policy
+
+
+@dataclass
+class WebsocketClientConfig:
+    heartbeat: Optional[float] = 30.0  # ping 的间隔, 超过该时间的一半未收到 pong 即视为断开
+    reconnect: bool = True
+    reconnect_backoff: float = 1.0
+    reconnect_max_backoff: float = 60.0
+    max_batch: int = 64  # 单次交给 policy 的最大帧数
+    queue_size: int = 1024  # 接收队列的长度, 队列满时暂停读取, 由 TCP 流控向对端施加背压
+
+    def backoff(self, attempt: int) -> float:
+        "第 attempt 次 (从 0 开始) 连接失败后等待的时间, 指数退避并加入抖动."
+        return random.uniform(0, min(self.reconnect_max_backoff, self.reconnect_backoff * 2**attempt))
+
+
+class AiohttpWebsocketClient(Service[WebsocketClientSchema, "Policy"]):
+    """基于 aiohttp 的 websocket 客户端 (正向 websocket).
+
+    每个通过 `register_endpoint(WebsocketClientSchema(url), policy)` 注册的 endpoint 在 mainline 中维持一个连接,
+    断开后按 `config` 以带抖动的指数退避自动重连. policy 可以实现以下方法:
+
+    - `on_connected(protocol)`: 连接建立后调用, 可以通过 `protocol.apply(WriteText(...))` 发送数据,
+      `protocol.connection_id` 可用于构造 `RpcMultiplexer`;
+    - `on_frames(protocol, frames)`: 以批的形式接收已解码的帧; 接收循环会一次取出队列中所有已到达的帧 (至多 `max_batch` 个);
+    - `on_disconnected(protocol)`: 连接断开后调用.
+
+    连接建立时发布 `NetworkConnected`, 第一个连接建立与最后一个连接断开时分别发布 `ServiceOnline` 与 `ServiceOffline`.
+    已建立的连接也可以通过 `Service.apply(connection_id, ...)` 发送数据.
+    """
+
+    id = ServiceId("org.graia", "avilla.core", "websocket", "client")
+    config: WebsocketClientConfig
+    decoder: Callable[[Union[str, bytes]], Any]
+
+    _aiohttp_session: Optional["ClientSession"]
+    _tasks: Dict[WebsocketClientSchema, "asyncio.Task[None]"]
+    _stopped: Optional[asyncio.Event]
+
+    def __init__(
+        self,
+        session: "ClientSession" = None,
+        config: WebsocketClientConfig = None,
+        decoder: Callable[[Union[str, bytes]], Any] = None,
+    ) -> None:
+        self._aiohttp_session = session
+        self.config = config or WebsocketClientConfig()
+        self.decoder = decoder or get_codec().loads
+        self._tasks = {}
+        self._stopped = None
+        super().__init__()
+
+    @property
+    def session(self) -> "ClientSession":
+        if self._aiohttp_session is None:
+            from aiohttp import ClientSession
+
+            self._aiohttp_session = ClientSession()
+        return self._aiohttp_session
+
+    @property
+    def launch_component(self) -> LaunchComponent:
+        return LaunchComponent(
+            self.id.avilla_uri,
+            set(),
+            self.launch_mainline,
+            self.launch_prepare,
+            self.launch_cleanup,
+        )
+
+    @property
+    def online(self) -> bool:
+        return bool(self.connections)
+
+    def create_connection_obj(self) -> str:
+        return super().create_connection_obj()
+
+    def destroy_connection_obj(self, connection_id: str) -> None:
+        return super().destroy_connection_obj(connection_id)
+
+    def register_endpoint(
+        self, schema: WebsocketClientSchema, policy: "Policy"
+    ) -> Endpoint[WebsocketClientSchema, "Policy"]:
+        endpoint = super().register_endpoint(schema, policy)
+        if self._stopped is not None and not self._stopped.is_set():
+            self._tasks[schema] = asyncio.create_task(self._maintain(endpoint))
+        return endpoint
+
+    def remove_endpoint(self, endpoint: Endpoint[WebsocketClientSchema, "Policy"]) -> None:
+        super().remove_endpoint(endpoint)
+        task = self._tasks.pop(endpoint.metadata, None)
+        if task is not None:
+            task.cancel()
+
+    def _post(self, event: "Dispatchable") -> None:
+        from avilla.core.context import ctx_avilla
+
+        avilla = ctx_avilla.get()
+        if avilla is not None:
+            avilla.broadcast.postEvent(event)
+
+    async def _maintain(self, endpoint: Endpoint[WebsocketClientSchema, "Policy"]) -> None:
+        from aiohttp import ClientError
+        from loguru import logger
+
+        schema = endpoint.metadata
+        attempt = 0
+        while True:
+            try:
+                ws = await self.session.ws_connect(
+                    schema.url, headers=schema.headers, heartbeat=self.config.heartbeat
+                )
+            except (ClientError, asyncio.TimeoutError, OSError) as e:
+                logger.warning(f"failed to connect to {schema.url}: {e!r}")
+            else:
+                attempt = 0
+                try:
+                    await self._serve(endpoint, ws)
+                except Exception:
+                    logger.exception(f"error occurred in websocket connection to {schema.url}")
+                finally:
+                    await ws.close()
+            if not self.config.reconnect or (self._stopped is not None and self._stopped.is_set()):
+                return
+            await asyncio.sleep(self.config.backoff(attempt))
+            attempt += 1
+
+    async def _serve(self, endpoint: Endpoint, ws: "ClientWebSocketResponse") -> None:
+        from loguru import logger
+
+        from avilla.core.event.service import NetworkConnected, ServiceOffline, ServiceOnline
+
+        async def write(activity: Write) -> None:
+            await ws.send_bytes(activity.content)
+
+        async def write_text(activity: WriteText) -> None:
+            await ws.send_str(activity.content)
+
+        first = not self.connections
+        connection_id = self.create_connection_obj()
+        activity_handlers = {Write: write, WriteText: write_text}
+        protocol = PolicyProtocol(endpoint, {}, activity_handlers, connection_id)  # type: ignore
+        policy = endpoint.policy
+
+        self.connections.objects[connection_id] = ws
+        await self.broadcast_handlers(connection_id, {}, activity_handlers)  # type: ignore
+        if first:
+            self._post(ServiceOnline(self))
+        self._post(NetworkConnected(self, connection_id))
+
+        queue: "asyncio.Queue[Any]" = asyncio.Queue(self.config.queue_size)
+        reader = asyncio.create_task(self._read(ws, queue))
+        try:
+            if hasattr(policy, "on_connected"):
+                await policy.on_connected(protocol)
+            await self._dispatch(policy, protocol, queue, reader)
+        finally:
+            reader.cancel()
+            # 取走 reader 的结果, 读取时的异常 (连接被重置等) 只记录下来
+            (error,) = await asyncio.gather(reader, return_exceptions=True)
+            if isinstance(error, Exception):
+                logger.warning(f"websocket connection to {endpoint.metadata.url} failed: {error!r}")
+            self.destroy_connection_obj(connection_id)
+            if hasattr(policy, "on_disconnected"):
+                await policy.on_disconnected(protocol)
+            if not self.connections:
+                self._post(ServiceOffline(self))
+
+    async def _read(self, ws: "ClientWebSocketResponse", queue: "asyncio.Queue[Any]") -> None:
+        from aiohttp import WSMsgType
+
+        async for message in ws:
+            if message.type in (WSMsgType.TEXT, WSMsgType.BINARY):
+                await queue.put(message.data)
+            elif message.type == WSMsgType.ERROR:
+                break
+
+    async def _dispatch(
+        self, policy: Any, protocol: PolicyProtocol, queue: "asyncio.Queue[Any]", reader: "asyncio.Task[None]"
+    ) -> None:
+        from loguru import logger
+
+        max_batch = self.config.max_batch
+        decoder = self.decoder
+        on_frames = getattr(policy, "on_frames", None)
+        stats = self.connections.stats.get(protocol.connection_id)  # type: ignore
+        getter: Optional["asyncio.Task[Any]"] = None
+        try:
+            while True:
+                if queue.empty():
+                    if reader.done():
+                        return
+                    getter = asyncio.ensure_future(queue.get())
+                    await asyncio.wait((getter, reader), return_when=asyncio.FIRST_COMPLETED)
+                    if not getter.done():
+                        # 连接已关闭; 取消等待后, 下一轮会取走队列中剩余的帧, 队列为空时退出
+                        getter.cancel()
+                        getter = None
+                        continue
+                    batch = [getter.result()]
+                    getter = None
+                else:
+                    batch = [queue.get_nowait()]
+                while len(batch) < max_batch and not queue.empty():
+                    batch.append(queue.get_nowait())
+                if stats is not None:
+                    stats.received += len(batch)
+
+                frames = []
+                for raw in batch:
+                    try:
+                        frames.append(decoder(raw))
+                    except ValueError:
+                        logger.warning(f"failed to decode websocket frame: {raw[:64]!r}")
+                if frames and on_frames is not None:
+                    try:
+                        await on_frames(protocol, frames)
+                    except Exception:
+                        # policy 的错误不代表连接出错, 不应断开连接并触发重连
+                        logger.exception(f"error occurred in on_frames of {policy!r}")
+        finally:
+            if getter is not None:
+                getter.cancel()
+
+    async def launch_prepare(self):
+        self._stopped = asyncio.Event()
+
+    async def launch_mainline(self):
+        for endpoint in self.endpoints.values():
+            if endpoint.metadata not in self._tasks:
+                self._tasks[endpoint.metadata] = asyncio.create_task(self._maintain(endpoint))
+        if self._stopped is not None:
+            await self._stopped.wait()
+
+    def stop(self) -> None:
+        "停止重连并结束 launch_mainline, 之后由 Avilla 进行 cleanup."
+        if self._stopped is not None:
+            self._stopped.set()
+
+    async def launch_cleanup(self):
+        tasks = list(self._tasks.values())
+        self._tasks.clear()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        if self._aiohttp_session is not None:
+            await self._aiohttp_session.close()
@@ -23,3 +23,8 @@ class SetCookie(Activity):
 @dataclass
 class SetStatusCode(Activity):
     status: int
+
+
+@dataclass
+class WriteText(Activity):
+    content: str
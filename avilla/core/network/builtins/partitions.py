@@ -1,4 +1,5 @@
 from dataclasses import dataclass
+from typing import AsyncIterator, Union
 
 from avilla.core.network.partition import PartitionSymbol
 
@@ -7,6 +8,20 @@ class Read(PartitionSymbol[bytes]):
     pass
 
 
+@dataclass
+class ReadChunks(PartitionSymbol[AsyncIterator[bytes]]):
+    "以异步迭代器的形式分块读取内容, 不会将全部内容读入内存; 可以直接交给 ChunkStream 或 FileProvider.from_chunks."
+
+    chunk_size: int = 64 * 1024
+
+
+@dataclass
+class ReadInto(PartitionSymbol[int]):
+    "读取至多 len(buffer) 字节到调用方提供的 buffer 中, 返回读取的字节数, 为 0 时表示已经读完."
+
+    buffer: Union[bytearray, memoryview]
+
+
 @dataclass
 class GetHeader(PartitionSymbol[str]):
     key: str
@@ -0,0 +1,198 @@
+import itertools
+import sys
+import time
+from dataclasses import dataclass, field
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Type,
+    TypeVar,
+)
+
+from avilla.core.utilles import random_string
+
+if TYPE_CHECKING:
+    from avilla.core.network.service import Service, TActivityHandler, TPartitionHandler
+
+TService = TypeVar("TService", bound="Service")
+
+# 进程内共享的连接 id 分配器: 随机前缀 + 自增序号, 分配只需一次 next() 与字符串拼接, 且在进程内不会重复
+_connection_prefix = random_string(8)
+_connection_sequence = itertools.count()
+
+
+def allocate_connection_id() -> str:
+    return f"{_connection_prefix}-{next(_connection_sequence)}"
+
+
+class ServiceRegistry(Sequence["Service"]):
+    """按 URI, 协议名 (`ServiceId.protocol_name`) 与类型索引的 Service 集合, 查找与增删均为 O(1).
+
+    同一类型的 Service 共享同一个 `id`, 因此一个键下可能有多个 Service, 按注册顺序排列;
+    按类型索引时 Service 会登记在其所有 Service 子类的父类下, `first_of_type(AiohttpHttpClient)` 等价于按 isinstance 查找.
+
+    为兼容 `Avilla.services` 原本的列表用法, 同时支持按注册顺序的下标与切片访问 (O(n)),
+    `append`, `extend`, `remove`, `pop`, `clear`, `index` 与 `count`; 不支持在指定位置插入或替换.
+    """
+
+    _services: Dict["Service", None]
+    _by_uri: Dict[str, Dict["Service", None]]
+    _by_protocol: Dict[str, Dict["Service", None]]
+    _by_type: Dict[type, Dict["Service", None]]
+
+    def __init__(self, services: Iterable["Service"] = ()) -> None:
+        self._services = {}
+        self._by_uri = {}
+        self._by_protocol = {}
+        self._by_type = {}
+        for service in services:
+            self.add(service)
+
+    def __contains__(self, service: object) -> bool:
+        return service in self._services
+
+    def __iter__(self) -> Iterator["Service"]:
+        return iter(self._services)
+
+    def __len__(self) -> int:
+        return len(self._services)
+
+    def __getitem__(self, index):
+        return list(self._services)[index]
+
+    def __reversed__(self) -> Iterator["Service"]:
+        return reversed(list(self._services))
+
+    def index(self, service: Any, start: int = 0, stop: int = sys.maxsize) -> int:
+        return list(self._services).index(service, start, stop)
+
+    def count(self, service: Any) -> int:
+        return int(service in self._services)
+
+    def __repr__(self) -> str:
+        return f"ServiceRegistry({list(self._services)!r})"
+
+    @staticmethod
+    def _service_types(service: "Service") -> List[type]:
+        from avilla.core.network.service import Service
+
+        return [cls for cls in type(service).__mro__ if issubclass(cls, Service)]
+
+    def add(self, service: "Service") -> None:
+        if service in self._services:
+            raise ValueError("existed service")
+        self._services[service] = None
+        self._by_uri.setdefault(service.id.avilla_uri, {})[service] = None
+        self._by_protocol.setdefault(service.id.protocol_name, {})[service] = None
+        for cls in self._service_types(service):
+            self._by_type.setdefault(cls, {})[service] = None
+
+    def remove(self, service: "Service") -> None:
+        if service not in self._services:
+            raise ValueError("service doesn't exist.")
+        del self._services[service]
+        keys: List[Tuple[Dict[Any, Dict["Service", None]], Any]] = [
+            (self._by_uri, service.id.avilla_uri),
+            (self._by_protocol, service.id.protocol_name),
+            *((self._by_type, cls) for cls in self._service_types(service)),
+        ]
+        for index, key in keys:
+            bucket = index[key]
+            del bucket[service]
+            if not bucket:
+                del index[key]
+
+    append = add
+
+    def extend(self, services: Iterable["Service"]) -> None:
+        for service in services:
+            self.add(service)
+
+    def pop(self, index: int = -1) -> "Service":
+        service = self[index]
+        self.remove(service)
+        return service
+
+    def clear(self) -> None:
+        self._services.clear()
+        self._by_uri.clear()
+        self._by_protocol.clear()
+        self._by_type.clear()
+
+    def get(self, uri: str) -> Optional["Service"]:
+        "返回以 uri 注册的第一个 Service."
+        return next(iter(self._by_uri.get(uri, ())), None)
+
+    def get_all(self, uri: str) -> List["Service"]:
+        return list(self._by_uri.get(uri, ()))
+
+    def by_protocol(self, protocol_name: str) -> List["Service"]:
+        return list(self._by_protocol.get(protocol_name, ()))
+
+    def by_type(self, service_type: Type[TService]) -> List[TService]:
+        return list(self._by_type.get(service_type, ()))  # type: ignore
+
+    def first_of_type(self, service_type: Type[TService]) -> Optional[TService]:
+        return next(iter(self._by_type.get(service_type, ())), None)  # type: ignore
+
+
+@dataclass
+class ConnectionStats:
+    created_at: float = field(default_factory=time.monotonic)
+    activities: int = 0  # 通过 Service.apply 应用的 activity 数量
+    partitions: int = 0  # 通过 Service.partition 读取的次数
+    received: int = 0  # 由 Service 自行记录的接收数量 (如 websocket 的帧数)
+
+    @property
+    def age(self) -> float:
+        return time.monotonic() - self.created_at
+
+
+class ConnectionRegistry:
+    """Service 中的抽象连接: 连接对象, 通过 `broadcast_handlers` 发布的处理函数表与统计信息, 均以连接 id 索引."""
+
+    objects: Dict[str, Any]
+    handlers: Dict[str, Tuple[Dict[type, "TPartitionHandler"], Dict[type, "TActivityHandler"]]]
+    stats: Dict[str, ConnectionStats]
+
+    def __init__(self) -> None:
+        self.objects = {}
+        self.handlers = {}
+        self.stats = {}
+
+    def __contains__(self, connection_id: object) -> bool:
+        return connection_id in self.objects
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.objects)
+
+    def __len__(self) -> int:
+        return len(self.objects)
+
+    def open(self, obj: Any = None) -> str:
+        connection_id = allocate_connection_id()
+        self.objects[connection_id] = obj
+        self.stats[connection_id] = ConnectionStats()
+        return connection_id
+
+    def close(self, connection_id: str) -> Any:
+        "移除连接并返回其连接对象; 连接不存在时抛出 KeyError."
+        obj = self.objects.pop(connection_id)
+        self.handlers.pop(connection_id, None)
+        self.stats.pop(connection_id, None)
+        return obj
+
+    def close_all(self) -> Dict[str, Any]:
+        "移除所有连接, 返回 连接 id -> 连接对象, 由调用方关闭这些对象."
+        objects = self.objects
+        self.objects = {}
+        self.handlers.clear()
+        self.stats.clear()
+        return objects
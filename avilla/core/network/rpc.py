@@ -0,0 +1,119 @@
+import asyncio
+import itertools
+import time
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterable, List, Optional
+
+from avilla.core.network.builtins.activities import WriteText
+from avilla.core.transformers.codec import get_codec
+from avilla.core.utilles.metrics import LatencyHistogram
+
+if TYPE_CHECKING:
+    from avilla.core.network.service import Service
+
+# 比 DEFAULT_LATENCY_BUCKETS 更细, 单个连接上的调用通常在毫秒级完成
+RPC_LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class RpcMultiplexer:
+    """在 Service 的单个连接上复用多个请求/响应式调用 (OneBot 的 echo 等).
+
+    `call` 为发出的帧加上唯一的 `echo_field` 并通过 `Service.apply(connection_id, WriteText(...))` 发送,
+    随后等待对应的响应; 连接的接收方 (如 websocket policy 的 `on_frames`) 应将收到的帧交给 `feed`/`feed_many`,
+    带有未完成的 echo 的帧会完成对应的调用, 其余的帧 (事件等) 原样返回. 连接断开时应调用 `close`.
+
+    超时由 `loop.call_later` 实现, 不会为每个调用创建额外的 Task.
+    """
+
+    service: "Service"
+    connection_id: str
+    echo_field: str
+    timeout: float
+    encoder: Callable[[Any], str]
+    latency: LatencyHistogram
+    timeouts: int
+
+    _pending: "Dict[str, asyncio.Future[Any]]"
+    _sequence: "itertools.count[int]"
+
+    def __init__(
+        self,
+        service: "Service",
+        connection_id: str,
+        echo_field: str = "echo",
+        timeout: float = 30.0,
+        encoder: Callable[[Any], str] = None,
+    ) -> None:
+        self.service = service
+        self.connection_id = connection_id
+        self.echo_field = echo_field
+        self.timeout = timeout
+        self.encoder = encoder or get_codec().dumps
+        self.latency = LatencyHistogram(RPC_LATENCY_BUCKETS)
+        self.timeouts = 0
+        self._pending = {}
+        self._sequence = itertools.count()
+
+    @property
+    def inflight(self) -> int:
+        return len(self._pending)
+
+    async def call(self, payload: Dict[str, Any], timeout: Optional[float] = None) -> Any:
+        "发送 payload 并返回带有相同 echo 的响应帧; 超时抛出 asyncio.TimeoutError, 连接关闭时抛出 ConnectionError."
+        loop = asyncio.get_running_loop()
+        echo = str(next(self._sequence))
+        frame = WriteText(self.encoder({**payload, self.echo_field: echo}))
+        future = self._pending[echo] = loop.create_future()
+        handle = loop.call_later(self.timeout if timeout is None else timeout, self._expire, echo)
+        start = time.perf_counter()
+        try:
+            await self.service.apply(self.connection_id, frame)
+            result = await future
+        except BaseException:
+            self.latency.errors += 1
+            raise
+        finally:
+            handle.cancel()
+            self._pending.pop(echo, None)
+        self.latency.observe(time.perf_counter() - start)
+        return result
+
+    def _expire(self, echo: str) -> None:
+        future = self._pending.pop(echo, None)
+        if future is not None and not future.done():
+            self.timeouts += 1
+            future.set_exception(asyncio.TimeoutError(f"rpc call {echo} timed out"))
+
+    def feed(self, frame: Any) -> bool:
+        "如果 frame 是某个调用的响应, 完成该调用并返回 True."
+        if not isinstance(frame, dict):
+            return False
+        echo = frame.get(self.echo_field)
+        if echo is None:
+            return False
+        future = self._pending.pop(str(echo), None)
+        if future is None:
+            return False
+        if not future.done():
+            future.set_result(frame)
+        return True
+
+    def feed_many(self, frames: Iterable[Any]) -> List[Any]:
+        "处理一批帧, 返回其中不是响应的帧."
+        return [frame for frame in frames if not self.feed(frame)]
+
+    def close(self, exc: BaseException = None) -> None:
+        "以 exc (默认为 ConnectionError) 结束所有未完成的调用."
+        pending, self._pending = self._pending, {}
+        for future in pending.values():
+            if not future.done():
+                future.set_exception(exc or ConnectionError("connection closed"))
+
+    def latency_summary(self) -> Dict[str, float]:
+        return {
+            "count": self.latency.count,
+            "errors": self.latency.errors,
+            "timeouts": self.timeouts,
+            "mean": self.latency.mean,
+            "p50": self.latency.quantile(0.5),
+            "p99": self.latency.quantile(0.99),
+        }
@@ -1,6 +1,7 @@
 from abc import ABCMeta, abstractmethod
 from contextlib import asynccontextmanager
 from dataclasses import dataclass
+from functools import cached_property
 from typing import (
     TYPE_CHECKING,
     Any,
@@ -10,7 +11,7 @@ from typing import (
     ClassVar,
     Dict,
     Generic,
-    Tuple,
+    Optional,
     Type,
     TypeVar,
     Union,
@@ -23,17 +24,18 @@ from avilla.core.network.activity import Activity
 from . import TActivity, TMetadata, TPolicy
 from .endpoint import Endpoint
 from .partition import PartitionSymbol
+from .registry import ConnectionRegistry
 
 
-@dataclass
+@dataclass(frozen=True)
 class ServiceId:
     publisher: str
     namespace: str
     protocol_name: str
     method: str
 
-    @property
-    def avilla_uri(self):
+    @cached_property
+    def avilla_uri(self) -> str:
         return f"avilla://service/{self.publisher}/{self.namespace}/{self.protocol_name}/{self.method}"
 
 
@@ -50,16 +52,19 @@ class PolicyProtocol:
     endpoint: Endpoint
     partition_handlers: Dict
     activity_handlers: Dict[Type[Activity], TActivityHandler]
+    connection_id: Optional[str] = None  # 对应 Service 中的连接, 可用于 `Service.apply`/`Service.partition`
 
     def __init__(
         self,
         endpoint: Endpoint,
         partition_handlers: Dict[Type[T], Callable[[T], Awaitable]],
         activity_handlers: Dict[Type[Activity], TActivityHandler],
+        connection_id: Optional[str] = None,
     ):
         self.endpoint = endpoint
         self.partition_handlers = partition_handlers
         self.activity_handlers = activity_handlers
+        self.connection_id = connection_id
 
     async def apply(self, *activities: Union[Activity, Type[Activity]]) -> None:
         for activity in activities:
@@ -82,20 +87,12 @@ class Service(Generic[TMetadata, TPolicy], metaclass=ABCMeta):
     id: ClassVar[ServiceId] = ServiceId("org.graia", "avilla.core", ".special", "null")
     endpoints: Dict[TMetadata, Endpoint[TMetadata, TPolicy]]
 
-    _connections: Dict[str, Any]
-    _connection_broadcasted_handlers: Dict[
-        str,
-        Tuple[
-            Dict[Type[PartitionSymbol], TPartitionHandler],  # Partition
-            Dict[Type[Activity], TActivityHandler],  # Activity
-        ],
-    ]
+    connections: ConnectionRegistry
 
     @abstractmethod
     def __init__(self) -> None:
         self.endpoints = {}
-        self._connections = {}
-        self._connection_broadcasted_handlers = {}
+        self.connections = ConnectionRegistry()
 
     @property
     @abstractmethod
@@ -107,7 +104,7 @@ class Service(Generic[TMetadata, TPolicy], metaclass=ABCMeta):
         """
         Register a new endpoint for the service, need override and super().call.
         """
-        endpoint: "Endpoint[TMetadata, TPolicy]" = Endpoint(schema, policy)  # type: ignore
+        endpoint: "Endpoint[TMetadata, TPolicy]" = Endpoint(policy=policy, metadata=schema)
         self.endpoints[schema] = endpoint
         return endpoint
 
@@ -119,10 +116,13 @@ class Service(Generic[TMetadata, TPolicy], metaclass=ABCMeta):
         self.endpoints.pop(endpoint.metadata)
 
     async def apply(self, connection: str, *activities: Union[Type[TActivity], TActivity]) -> None:
-        handler_tuple = self._connection_broadcasted_handlers.get(connection)
+        handler_tuple = self.connections.handlers.get(connection)
         if handler_tuple is None:
             raise TypeError(f"No broadcasted handlers for connection {connection}")
         _, activity_handlers = handler_tuple
+        stats = self.connections.stats.get(connection)  # 未经 connections.open 登记的连接不做统计
+        if stats is not None:
+            stats.activities += len(activities)
         for activity in activities:
             activity_class = type(activity) if isinstance(activity, Activity) else activity
             if activity_class not in activity_handlers:
@@ -130,11 +130,14 @@ class Service(Generic[TMetadata, TPolicy], metaclass=ABCMeta):
             await activity_handlers[activity_class](activity)
 
     async def partition(self, connection: str, partition: PartitionSymbol[_C]) -> _C:
-        handler_tuple = self._connection_broadcasted_handlers.get(connection)
+        handler_tuple = self.connections.handlers.get(connection)
         if handler_tuple is None:
             raise TypeError(f"No broadcasted handlers for connection {connection}")
         partition_handlers, _ = handler_tuple
-        if partition not in partition_handlers:
+        stats = self.connections.stats.get(connection)
+        if stats is not None:
+            stats.partitions += 1
+        if partition.__class__ not in partition_handlers:
             raise TypeError(f"No handler for {partition}")
         return await partition_handlers[partition.__class__](partition)
 
@@ -166,7 +169,7 @@ class Service(Generic[TMetadata, TPolicy], metaclass=ABCMeta):
         partition_handlers: Dict[Type[PartitionSymbol], TPartitionHandler],
         activity_handlers: Dict[Type[Activity], TActivityHandler],
     ) -> None:
-        self._connection_broadcasted_handlers[connection_id] = (
+        self.connections.handlers[connection_id] = (
             partition_handlers,
             activity_handlers,
         )
@@ -174,12 +177,17 @@ class Service(Generic[TMetadata, TPolicy], metaclass=ABCMeta):
     @abstractmethod
     def create_connection_obj(self) -> str:
         """抽象层处建立一个新的连接(即使是 HTTP 这种单次应答也需要)"""
+        return self.connections.open()
 
     @abstractmethod
     def destroy_connection_obj(self, connection_id: str) -> None:
         """将抽象连接移出抽象层"""
-        self._connections.pop(connection_id)
-        self._connection_broadcasted_handlers.pop(connection_id)
+        self.connections.close(connection_id)
+
+    def destroy_all_connections(self) -> None:
+        """将所有抽象连接移出抽象层, 逐个调用 destroy_connection_obj 以便子类关闭连接对象"""
+        for connection_id in list(self.connections):
+            self.destroy_connection_obj(connection_id)
 
     async def launch_mainline(self):
         """LaunchComponent.task"""
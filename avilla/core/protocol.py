@@ -1,11 +1,14 @@
 from abc import ABCMeta, abstractmethod, abstractproperty
+from collections import OrderedDict
 from contextlib import AsyncExitStack
-from typing import TYPE_CHECKING, Any, Generic, List, Type, Union
+from typing import TYPE_CHECKING, Any, ClassVar, Generic, Hashable, List, Tuple, Type, Union
 
+from avilla.core.context import ctx_protocol
 from avilla.core.launch import LaunchComponent
 from avilla.core.message.chain import MessageChain
 from avilla.core.platform import Platform
 from avilla.core.selectors import mainline as mainline_selector
+from avilla.core.selectors import rsctx
 from avilla.core.selectors import self as self_selector
 from avilla.core.typing import METADATA_VALUE, T_Config, T_ExecMW
 from avilla.core.utilles.selector import Selector
@@ -13,13 +16,20 @@ from avilla.core.utilles.selector import Selector
 from .execution import Execution
 
 if TYPE_CHECKING:
+    from graia.broadcast.entities.event import Dispatchable
+
     from . import Avilla
+    from .relationship import Relationship
 
 
 class BaseProtocol(Generic[T_Config], metaclass=ABCMeta):
     avilla: "Avilla"
     config: T_Config
 
+    relationship_cache_size: ClassVar[int] = 1024  # 每个账号 (protocol 实例) 缓存的 Relationship 数量
+
+    _relationships: "OrderedDict[Hashable, Tuple[Any, Relationship]]"  # key -> (ctx, Relationship)
+
     platform: Platform = Platform(
         name="Avilla Universal Protocol Implementation",
         protocol_provider_name="Avilla Protocol",
@@ -31,6 +41,7 @@ class BaseProtocol(Generic[T_Config], metaclass=ABCMeta):
     def __init__(self, avilla: "Avilla", config: T_Config) -> None:
         self.avilla = avilla
         self.config = config
+        self._relationships = OrderedDict()
         self.using_networks, self.using_exec_method = self.ensure_networks()
         self.__post_init__()
 
@@ -73,10 +84,54 @@ class BaseProtocol(Generic[T_Config], metaclass=ABCMeta):
     def has_ability(self, ability: str) -> bool:
         raise NotImplementedError
 
+    @staticmethod
+    def _relationship_key(ctx: Any) -> Hashable:
+        # Selector 按内容, 其他可哈希的对象按自身; 不可哈希的 (如 Contactable) 按 id,
+        # 缓存中同时持有 ctx 本身, 因此在条目被淘汰前 id 不会被其他对象复用
+        as_key = getattr(ctx, "as_key", None)
+        if as_key is not None:
+            return as_key()
+        try:
+            hash(ctx)
+        except TypeError:
+            return ("id", id(ctx))
+        return ctx
+
+    async def get_relationship(self, ctx: Union[rsctx, Any]) -> "Relationship":
+        "该账号与 ctx 的 Relationship, 按 ctx 以 LRU 缓存, 各账号的缓存互不影响."
+        key = self._relationship_key(ctx)
+        entry = self._relationships.get(key)
+        if entry is not None:
+            self._relationships.move_to_end(key)
+            return entry[1]
+
+        from .relationship import Relationship
+
+        relationship = Relationship(self, ctx, self.get_self(), self.avilla.middlewares)
+        self._relationships[key] = (ctx, relationship)
+        if len(self._relationships) > self.relationship_cache_size:
+            self._relationships.popitem(last=False)
+        return relationship
+
+    def forget_relationships(self) -> None:
+        self._relationships.clear()
+
+    def post_event(self, event: "Dispatchable") -> None:
+        "以该账号投递事件: 事件处理中的 ctx_protocol 为该 protocol, 据此注入 protocol 与 Relationship."
+        with ctx_protocol.use(self):
+            self.avilla.broadcast.postEvent(event)
+
     async def exec_directly(self, execution: Execution, *middlewares: T_ExecMW) -> Any:
+        from .relationship import ExecutionShortcut
+
         async with AsyncExitStack() as exit_stack:
+            shortcut = None
             for middleware in middlewares:
-                await exit_stack.enter_async_context(middleware(self, execution))  # type: ignore
+                entered = await exit_stack.enter_async_context(middleware(self, execution))  # type: ignore
+                if isinstance(entered, ExecutionShortcut):
+                    shortcut = entered
+            if shortcut is not None:
+                return await shortcut.result
             return await self.ensure_execution(execution)
 
     def check_mainline(self, mainline: mainline_selector) -> bool:
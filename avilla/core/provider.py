@@ -1,12 +1,34 @@
 import abc
+import asyncio
+import hashlib
+import mmap
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Generic, TypeVar, Union
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    AsyncIterable,
+    AsyncIterator,
+    ClassVar,
+    Dict,
+    Generic,
+    Optional,
+    Tuple,
+    TypeVar,
+    Union,
+)
 
 import aiofiles
 
+from avilla.core.utilles.http_cache import CachedResponse, HttpCache
+
+if TYPE_CHECKING:
+    from aiohttp import ClientSession
+
 T = TypeVar("T")
 
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
 
 @dataclass
 class Provider(abc.ABC, Generic[T]):
@@ -16,19 +38,97 @@ class Provider(abc.ABC, Generic[T]):
     async def __call__(self) -> T:
         raise NotImplementedError()
 
+    async def stream(self, chunk_size: int = DEFAULT_CHUNK_SIZE) -> AsyncIterator[T]:
+        "分块获取资源, 默认实现一次性返回 `__call__` 的结果; 可以分块读取的 Provider 应当重写该方法."
+        yield await self()
+
+    async def digest(self) -> str:
+        "资源内容的 sha256, 只在第一次调用时计算."
+        digest = self.__dict__.get("_digest")
+        if digest is None:
+            hasher = hashlib.sha256()
+            async for chunk in self.stream():
+                hasher.update(chunk)  # type: ignore
+            digest = self.__dict__["_digest"] = hasher.hexdigest()
+        return digest
+
+    def cached_digest(self) -> Optional[str]:
+        "已经计算过的摘要, 不会读取资源; 尚未计算时为 None."
+        return self.__dict__.get("_digest")
+
+    async def read_with_digest(self) -> Tuple[bytes, str]:
+        "读取一次资源, 返回内容与根据这份内容计算的摘要 (同时被缓存), 避免先计算摘要再读取时的两次读取."
+        content = bytes(await self())  # type: ignore
+        digest = self.__dict__["_digest"] = hashlib.sha256(content).hexdigest()
+        return content, digest
+
 
 class FileProvider(Provider[bytes]):
+    """读取本地文件. 文件在 Provider 被调用时才会被读取.
+
+    `use_mmap` 为 True 时, `__call__` 返回映射该文件的 memoryview, 而不是将整个文件读入内存.
+    """
+
     path: Path
+    use_mmap: bool
 
-    def __init__(self, path: Union[Path, str]):
+    def __init__(self, path: Union[Path, str], use_mmap: bool = False):
         if isinstance(path, str):
             path = Path(path)
         self.path = path
+        self.use_mmap = use_mmap
+
+    @classmethod
+    async def from_chunks(
+        cls, path: Union[Path, str], chunks: AsyncIterable[bytes], use_mmap: bool = False
+    ) -> "FileProvider":
+        "将分块的内容 (如 `ReadChunks` 的结果) 逐块写入 path, 并返回读取该文件的 FileProvider."
+        async with aiofiles.open(str(path), "wb") as f:
+            async for chunk in chunks:
+                await f.write(chunk)
+        return cls(path, use_mmap)
 
     async def __call__(self) -> bytes:
+        if self.use_mmap:
+            return self.mapped()  # type: ignore
         async with aiofiles.open(str(self.path), "rb") as f:
             return await f.read()
 
+    async def stream(self, chunk_size: int = DEFAULT_CHUNK_SIZE) -> AsyncIterator[bytes]:
+        async with aiofiles.open(str(self.path), "rb") as f:
+            while True:
+                chunk = await f.read(chunk_size)
+                if not chunk:
+                    return
+                yield chunk
+
+    def _check_digest_version(self) -> None:
+        # 文件可能在两次发送之间被修改, 以大小与修改时间判断缓存的摘要是否仍然有效
+        stat = self.path.stat()
+        version = (stat.st_size, stat.st_mtime_ns)
+        if self.__dict__.get("_digest_version") != version:
+            self.__dict__.pop("_digest", None)
+            self.__dict__["_digest_version"] = version
+
+    async def digest(self) -> str:
+        self._check_digest_version()
+        return await super().digest()
+
+    def cached_digest(self) -> Optional[str]:
+        self._check_digest_version()
+        return super().cached_digest()
+
+    async def read_with_digest(self) -> Tuple[bytes, str]:
+        self._check_digest_version()
+        return await super().read_with_digest()
+
+    def mapped(self) -> memoryview:
+        "以只读方式映射文件; 页面在被访问时才由系统载入, 映射在 memoryview 不再被引用后释放."
+        with open(self.path, "rb") as f:
+            if not self.path.stat().st_size:
+                return memoryview(b"")
+            return memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+
 
 class RawProvider(Provider[bytes]):
     raw: bytes
@@ -39,16 +139,106 @@ class RawProvider(Provider[bytes]):
     async def __call__(self) -> bytes:
         return self.raw
 
+    async def digest(self) -> str:
+        digest = self.__dict__.get("_digest")
+        if digest is None:
+            digest = self.__dict__["_digest"] = hashlib.sha256(self.raw).hexdigest()
+        return digest
+
+    async def stream(self, chunk_size: int = DEFAULT_CHUNK_SIZE) -> AsyncIterator[bytes]:
+        view = memoryview(self.raw)
+        for offset in range(0, len(view), chunk_size):
+            yield view[offset : offset + chunk_size]
+
 
 class HttpGetProvider(Provider[bytes]):
+    """通过 HTTP GET 获取资源.
+
+    连接从共享的 ClientSession 中取得, 依次尝试: 构造时传入的 `session`, 当前 Avilla 中
+    AiohttpHttpClient 的 session, 以及每个事件循环上共享的 session; 后者需要在事件循环关闭前通过
+    `close_shared_session` 关闭 (`Avilla.launch` 退出时会自动关闭).
+    同一事件循环中, 使用相同 session 与缓存的同一 URL 同时进行的多个请求会被合并为一个; 设置了 `cache` (或类属性 `default_cache`) 时,
+    带有 ETag/Last-Modified 的响应会被缓存, 之后以条件请求重新验证.
+    """
+
     url: str
+    session: Optional["ClientSession"]
+    cache: Optional[HttpCache]
+
+    default_cache: ClassVar[Optional[HttpCache]] = None
 
-    def __init__(self, url: str):
+    # session 持有其事件循环, 因此不能以弱引用为键; 由 close_shared_session 显式移除
+    _shared_sessions: ClassVar[Dict[asyncio.AbstractEventLoop, "ClientSession"]] = {}
+    # (事件循环, session, 缓存, URL) -> 进行中的请求
+    _inflight: ClassVar[Dict[Tuple[Any, ...], "asyncio.Future[bytes]"]] = {}
+
+    def __init__(self, url: str, session: "ClientSession" = None, cache: HttpCache = None):
         self.url = url
+        self.session = session
+        self.cache = cache
+
+    def get_session(self) -> "ClientSession":
+        if self.session is not None:
+            return self.session
+
+        from avilla.core.context import ctx_avilla
+        from avilla.core.network.aiohttp.service import AiohttpHttpClient
+
+        avilla = ctx_avilla.get()
+        if avilla is not None:
+            service = avilla.get_service_by_type(AiohttpHttpClient)
+            if service is not None:
+                return service.session
+
+        loop = asyncio.get_running_loop()
+        session = self._shared_sessions.get(loop)
+        if session is None or session.closed:
+            from aiohttp import ClientSession
+
+            # 事件循环已经关闭的 session 无法再关闭, 只能丢弃
+            for stale in [i for i in self._shared_sessions if i.is_closed()]:
+                del self._shared_sessions[stale]
+            session = self._shared_sessions[loop] = ClientSession()
+        return session
+
+    @classmethod
+    async def close_shared_session(cls) -> None:
+        "关闭当前事件循环上的共享 session."
+        session = cls._shared_sessions.pop(asyncio.get_running_loop(), None)
+        if session is not None and not session.closed:
+            await session.close()
 
     async def __call__(self) -> bytes:
-        import aiohttp
-
-        async with aiohttp.ClientSession() as session:
-            async with session.get(self.url) as resp:
-                return await resp.read()
+        session = self.get_session()
+        cache = self.cache if self.cache is not None else self.default_cache
+        key = (asyncio.get_running_loop(), session, cache, self.url)
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            return await asyncio.shield(inflight)
+
+        future = self._inflight[key] = asyncio.ensure_future(self._fetch(session, cache))
+        future.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return await asyncio.shield(future)
+
+    async def stream(self, chunk_size: int = DEFAULT_CHUNK_SIZE) -> AsyncIterator[bytes]:
+        "分块读取响应体, 不经过缓存与请求合并."
+        async with self.get_session().get(self.url) as resp:
+            async for chunk in resp.content.iter_chunked(chunk_size):
+                yield chunk
+
+    async def _fetch(self, session: "ClientSession", cache: Optional[HttpCache]) -> bytes:
+        cached = await cache.get(self.url) if cache is not None else None
+        headers = cached.revalidate_headers if cached is not None else None
+
+        async with session.get(self.url, headers=headers) as resp:
+            if cached is not None and resp.status == 304:
+                return cached.content
+            content = await resp.read()
+            if cache is not None and resp.status == 200:
+                etag = resp.headers.get("ETag")
+                last_modified = resp.headers.get("Last-Modified")
+                if "no-store" in resp.headers.get("Cache-Control", ""):
+                    await cache.discard(self.url)
+                elif etag is not None or last_modified is not None:
+                    await cache.set(self.url, CachedResponse(content, etag, last_modified))
+            return content
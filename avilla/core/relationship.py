@@ -1,38 +1,140 @@
-from contextlib import AsyncExitStack, asynccontextmanager
+import asyncio
+from contextlib import AsyncExitStack
+from contextvars import Token
 from datetime import timedelta
-from typing import TYPE_CHECKING, Generic, List, Union
+from typing import TYPE_CHECKING, Any, Awaitable, ClassVar, Dict, Generic, Iterable, List, Optional, Union
+
+from graia.broadcast.utilles import Ctx
 
 from avilla.core.context import ctx_rsexec_period, ctx_rsexec_to
-from avilla.core.execution import Execution
-from avilla.core.metadata import Metadata
 from avilla.core.selectors import mainline, rsctx
 from avilla.core.selectors import self as self_selector
 from avilla.core.typing import T_ExecMW, T_Profile
 
 if TYPE_CHECKING:
+    from avilla.core.execution import Execution
+    from avilla.core.metadata import Metadata
     from avilla.core.protocol import BaseProtocol
 
 
-class ExecutorWrapper:
+class ContextInjector:
+    "进入时将 value 设置到 ctx 上, 退出时复原; 代替每次都要重新构造的 asynccontextmanager."
+
+    __slots__ = ("ctx", "value", "token")
+
+    ctx: Ctx
+    value: Any
+    token: Optional[Token]
+
+    def __init__(self, ctx: Ctx, value: Any) -> None:
+        self.ctx = ctx
+        self.value = value
+        self.token = None
+
+    async def __aenter__(self) -> None:
+        self.token = self.ctx.set(self.value)
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        self.ctx.reset(self.token)  # type: ignore
+
+
+class ExecutionShortcut:
+    """执行中间件可以在进入时返回该对象, 此时不再调用 `ensure_execution`, 而是以 `result` 的结果作为执行结果.
+    用于合并, 复用执行等场合.
+    """
+
+    __slots__ = ("result",)
+
+    result: Awaitable[Any]
+
+    def __init__(self, result: Awaitable[Any]) -> None:
+        self.result = result
+
+
+class TargetInjector:
+    __slots__ = ("target",)
+
+    target: Union[rsctx, mainline]
+
+    def __init__(self, target: Union[rsctx, mainline]) -> None:
+        self.target = target
+
+    def __call__(self, rs: "Relationship", exec: "Execution") -> ContextInjector:
+        if isinstance(self.target, mainline):
+            rs.protocol.check_mainline(self.target)
+        return ContextInjector(ctx_rsexec_to, self.target)
+
+
+class PeriodInjector:
+    __slots__ = ("period",)
+
+    period: timedelta
+
+    def __init__(self, period: timedelta) -> None:
+        self.period = period
+
+    def __call__(self, rs: "Relationship", exec: "Execution") -> ContextInjector:
+        return ContextInjector(ctx_rsexec_period, self.period)
+
+
+class _MiddlewareChain:
+    __slots__ = ("relationship", "middlewares", "_middlewares_owned")
+
     relationship: "Relationship"
-    execution: "Execution"
     middlewares: List[T_ExecMW]
 
     def __init__(self, relationship: "Relationship") -> None:
         self.relationship = relationship
+        self.middlewares = relationship._middlewares
+        self._middlewares_owned = False
 
-    def __await__(self):
-        exit_stack = AsyncExitStack()
-        yield from exit_stack.__aenter__().__await__()
-        try:
+    async def _execute_with_middlewares(self, execution: "Execution"):
+        async with AsyncExitStack() as exit_stack:
+            shortcut = None
             for middleware in self.middlewares:
-                yield from exit_stack.enter_async_context(
-                    middleware(self.relationship, self.execution)  # type: ignore
-                ).__await__()
-            result = yield from self.relationship.protocol.ensure_execution(self.execution)
-            return result
-        finally:
-            yield from exit_stack.__aexit__(None, None, None).__await__()
+                entered = await exit_stack.enter_async_context(
+                    middleware(self.relationship, execution)  # type: ignore
+                )
+                if isinstance(entered, ExecutionShortcut):
+                    shortcut = entered
+            if shortcut is not None:
+                return await shortcut.result
+            return await self.relationship.protocol.ensure_execution(execution)
+
+    def _append_middleware(self, middleware: T_ExecMW) -> None:
+        if not self._middlewares_owned:
+            self.middlewares = list(self.middlewares)
+            self._middlewares_owned = True
+        self.middlewares.append(middleware)
+
+    def to(self, target: Union[rsctx, mainline]):
+        self._append_middleware(self.relationship._target_injector(target))  # type: ignore
+        return self
+
+    def period(self, period: timedelta):
+        self._append_middleware(self.relationship._period_injector(period))  # type: ignore
+        return self
+
+    def use(self, middleware: T_ExecMW):
+        self._append_middleware(middleware)
+        return self
+
+
+class ExecutorWrapper(_MiddlewareChain):
+    """`Relationship.exec` 的返回值.
+
+    中间件列表在第一次 `to`, `period` 或 `use` 时才会从 Relationship 复制 (copy-on-write);
+    没有任何中间件时直接等待 `ensure_execution`, 不会创建 AsyncExitStack.
+    """
+
+    __slots__ = ("execution",)
+
+    execution: "Execution"
+
+    def __await__(self):
+        if not self.middlewares:
+            return (yield from self.relationship.protocol.ensure_execution(self.execution).__await__())
+        return (yield from self._execute_with_middlewares(self.execution).__await__())
 
     def execute(self, execution: "Execution"):
         self.execution = execution
@@ -40,40 +142,67 @@ class ExecutorWrapper:
 
     __call__ = execute
 
-    def to(self, target: Union[rsctx, mainline]):
-        @asynccontextmanager
-        async def target_injector(rs: "Relationship", exec: Execution):
-            if isinstance(target, mainline):
-                rs.protocol.check_mainline(target)
-            with ctx_rsexec_to.use(target):
-                yield
-
-        self.middlewares.append(target_injector)  # type: ignore
-        return self
 
-    def period(self, period: timedelta):
-        @asynccontextmanager
-        async def period_injector(rs: "Relationship", exec: Execution):
-            with ctx_rsexec_period.use(period):
-                yield
+class BatchExecutor(_MiddlewareChain):
+    """`Relationship.exec_many` 的返回值, 用于一次性提交多个 Execution.
 
-        self.middlewares.append(period_injector)  # type: ignore
-        return self
+    中间件链 (包括 `to`, `period` 与 `use` 添加的) 只构建一次, 并应用到每一个 Execution 上;
+    至多 `concurrency` 个 Execution 同时经由协议执行, 结果按提交顺序返回,
+    执行失败的项以其抛出的异常对象代替结果.
+    """
 
-    def use(self, middleware: T_ExecMW):
-        self.middlewares.append(middleware)
+    __slots__ = ("executions", "concurrency")
+
+    executions: List["Execution"]
+    concurrency: int
+
+    def execute(self, executions: Iterable["Execution"], concurrency: int = 8):
+        if concurrency < 1:
+            raise ValueError("concurrency must be positive")
+        self.executions = list(executions)
+        self.concurrency = concurrency
         return self
 
+    __call__ = execute
+
+    def __await__(self):
+        return self._execute_all().__await__()
+
+    async def _execute_all(self) -> List[Any]:
+        executions = self.executions
+        results: List[Any] = [None] * len(executions)
+        positions = iter(range(len(executions)))
+        protocol = self.relationship.protocol
+        middlewares = self.middlewares
+
+        async def worker() -> None:
+            for position in positions:
+                try:
+                    if middlewares:
+                        results[position] = await self._execute_with_middlewares(executions[position])
+                    else:
+                        results[position] = await protocol.ensure_execution(executions[position])
+                except Exception as e:
+                    results[position] = e
+
+        await asyncio.gather(*[worker() for _ in range(min(self.concurrency, len(executions)))])
+        return results
+
 
 class Relationship(Generic[T_Profile]):
     ctx: rsctx
     mainline: mainline
-    metadata: Metadata
+    metadata: "Metadata"
     self: self_selector
 
     protocol: "BaseProtocol"
 
+    injector_cache_size: ClassVar[int] = 32
+
     _middlewares: List[T_ExecMW]
+    # to/period 使用的注入器: 目标按对象本身 (id) 复用, 时长按值复用; 超出 injector_cache_size 时清空
+    _target_injectors: Dict[int, TargetInjector]
+    _period_injectors: Dict[timedelta, PeriodInjector]
 
     def __init__(
         self,
@@ -86,6 +215,25 @@ class Relationship(Generic[T_Profile]):
         self.self = current_self
         self.protocol = protocol
         self._middlewares = middlewares or []
+        self._target_injectors = {}
+        self._period_injectors = {}
+
+    def _target_injector(self, target: Union[rsctx, mainline]) -> TargetInjector:
+        # 注入器持有 target, 因此条目存在期间 id 不会被复用; 同一个 id 对应其他对象时直接替换
+        injector = self._target_injectors.get(id(target))
+        if injector is None or injector.target is not target:
+            if len(self._target_injectors) >= self.injector_cache_size:
+                self._target_injectors.clear()
+            injector = self._target_injectors[id(target)] = TargetInjector(target)
+        return injector
+
+    def _period_injector(self, period: timedelta) -> PeriodInjector:
+        injector = self._period_injectors.get(period)
+        if injector is None:
+            if len(self._period_injectors) >= self.injector_cache_size:
+                self._period_injectors.clear()
+            injector = self._period_injectors[period] = PeriodInjector(period)
+        return injector
 
     @property
     def current(self) -> self_selector:
@@ -95,5 +243,9 @@ class Relationship(Generic[T_Profile]):
     def exec(self):
         return ExecutorWrapper(self)
 
+    @property
+    def exec_many(self):
+        return BatchExecutor(self)
+
     def has_ability(self, ability: str) -> bool:
         return self.protocol.has_ability(ability)
@@ -1,5 +1,5 @@
 from datetime import timedelta
-from typing import Any, List, TypeVar, Union, overload
+from typing import Any, Iterable, List, TypeVar, Union, overload
 
 from avilla.core.execution import Execution as Execution
 from avilla.core.execution import Result
@@ -22,6 +22,19 @@ class ExecutorWrapper:
     def period(self, period: timedelta): ...
     def use(self, middleware: T_ExecMW): ...
 
+class BatchExecutor:
+    relationship: "Relationship"
+    executions: List[Execution]
+    concurrency: int
+    middlewares: List[T_ExecMW]
+    def __init__(self, relationship: "Relationship") -> None: ...
+    def __await__(self): ...
+    def execute(self, executions: Iterable[Execution], concurrency: int = ...) -> "BatchExecutor": ...
+    __call__: Any
+    def to(self, target: Union[rsctx, mainline_selector]): ...
+    def period(self, period: timedelta): ...
+    def use(self, middleware: T_ExecMW): ...
+
 T = TypeVar("T")
 
 class Relationship:
@@ -44,3 +57,5 @@ class Relationship:
     async def exec(self, execution: Execution) -> Any: ...
     @overload
     async def exec(self, execution: Result[T]) -> T: ...
+    @property
+    def exec_many(self) -> BatchExecutor: ...
@@ -12,3 +12,7 @@ class Resource(Generic[TMetadata]):
     def __init__(self, provider: Provider, metadata: Optional[TMetadata] = None):
         self.provider = provider
         self.metadata = metadata
+
+    async def digest(self) -> str:
+        "资源内容的 sha256, 相同内容的资源有相同的摘要."
+        return await self.provider.digest()
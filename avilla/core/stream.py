@@ -1,33 +1,111 @@
 from inspect import iscoroutinefunction
-from typing import Any, Callable, Generic, List, TypeVar
-
-from graia.broadcast.utilles import run_always_await_safely
+from typing import Any, AsyncIterable, AsyncIterator, Callable, Generic, Iterable, List, TypeVar, Union
 
 T = TypeVar("T")
 
+T_ChunkTransformer = Callable[[AsyncIterator[Any]], AsyncIterator[Any]]
+
 
 class Stream(Generic[T]):
+    """对单个值依次应用 transformer.
+
+    transformer 是否为协程函数只在 wrappers 变化后判断一次; 不含协程函数的 Stream 在 `unwrap` 时不会进行任何 await.
+    """
+
     content: T
     wrappers: List[Callable[[Any], Any]]
 
+    _classified_wrappers: List[Callable[[Any], Any]]  # _async_flags 对应的 wrappers 的副本
+    _async_flags: List[bool]
+
     def __init__(self, initial: T) -> None:
         self.content = initial
         self.wrappers = []
+        self._classified_wrappers = []
+        self._async_flags = []
+
+    def _classified(self) -> List[bool]:
+        # wrappers 是公开的, 可能被追加, 删除或原地替换, 与副本不一致时重新分类
+        if self._classified_wrappers != self.wrappers:
+            self._classified_wrappers = list(self.wrappers)
+            self._async_flags = [iscoroutinefunction(wrapper) for wrapper in self.wrappers]
+        return self._async_flags
 
     async def unwrap(self) -> T:
+        flags = self._classified()
+        if not any(flags):
+            return self._run_sync()
         result = self.content
-        for wrapper in self.wrappers:
-            result = await run_always_await_safely(wrapper, result)
+        for wrapper, is_async in zip(self.wrappers, flags):
+            result = await wrapper(result) if is_async else wrapper(result)
         return result
 
     def unwrap_sync(self) -> T:
+        if any(self._classified()):
+            raise RuntimeError("Cannot unwrap a stream with a coroutine transformer in sync")
+        return self._run_sync()
+
+    def _run_sync(self) -> T:
         result = self.content
         for wrapper in self.wrappers:
-            if iscoroutinefunction(wrapper):
-                raise RuntimeError("Cannot unwrap a stream with a coroutine transformer in sync")
             result = wrapper(result)
         return result
 
     def transform(self, transformer: Callable[[Any], Any]):
         self.wrappers.append(transformer)
         return self
+
+
+async def _iterate(source: Union[AsyncIterable[T], Iterable[T]]) -> AsyncIterator[T]:
+    if hasattr(source, "__aiter__"):
+        async for chunk in source:  # type: ignore
+            yield chunk
+    else:
+        for chunk in source:  # type: ignore
+            yield chunk
+
+
+class ChunkStream(Generic[T]):
+    """Stream 的分块版本: 内容是一个 (异步) 可迭代对象, transformer 接受并返回异步迭代器.
+
+    适用于较大的内容 (如媒体数据, 大量事件的 JSON 导出), 可配合 `avilla.core.transformers.common`
+    中的 `*_chunks` 系列 transformer 逐块解码, 而不必将全部内容读入内存. 例如:
+
+        ChunkStream(provider.stream()).transform(u8_string_chunks()).transform(json_lines_decode())
+    """
+
+    source: Union[AsyncIterable[Any], Iterable[Any]]
+    wrappers: List[T_ChunkTransformer]
+
+    def __init__(self, source: Union[AsyncIterable[Any], Iterable[Any]]) -> None:
+        self.source = source
+        self.wrappers = []
+
+    def transform(self, transformer: T_ChunkTransformer):
+        self.wrappers.append(transformer)
+        return self
+
+    def map(self, func: Callable[[Any], Any]):
+        "对每个块应用 func, func 是否为协程函数在此时确定."
+        if iscoroutinefunction(func):
+
+            async def async_mapper(chunks: AsyncIterator[Any]) -> AsyncIterator[Any]:
+                async for chunk in chunks:
+                    yield await func(chunk)
+
+            return self.transform(async_mapper)
+
+        async def mapper(chunks: AsyncIterator[Any]) -> AsyncIterator[Any]:
+            async for chunk in chunks:
+                yield func(chunk)
+
+        return self.transform(mapper)
+
+    def __aiter__(self) -> AsyncIterator[T]:
+        chunks = _iterate(self.source)
+        for wrapper in self.wrappers:
+            chunks = wrapper(chunks)
+        return chunks
+
+    async def collect(self) -> List[T]:
+        return [chunk async for chunk in self]
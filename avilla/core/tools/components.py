@@ -13,6 +13,7 @@ class Components(Decorator, Generic[T]):
     _filter: Callable[[Element], bool]
     _match_times: Optional[int] = None
     _skip_times: int = 0
+    _element_type: Optional[Union[Type[Element], Tuple[Type[Element], ...]]] = None
 
     def __init__(
         self,
@@ -40,7 +41,9 @@ class Components(Decorator, Generic[T]):
         def matcher(element: Element):
             return isinstance(element, element_type)
 
-        return cls(matcher, match_times)
+        instance = cls(matcher, match_times)
+        instance._element_type = element_type
+        return instance
 
     async def target(self, interface: DecoratorInterface):
         chain: MessageChain
@@ -49,6 +52,13 @@ class Components(Decorator, Generic[T]):
         else:
             chain = interface.return_value
 
+        if self._element_type is not None:  # 纯类型匹配, 直接走消息链上的类型索引
+            root = chain.__root__
+            positions = chain._positions(self._element_type)
+            if self._match_times is not None:
+                positions = positions[: self._match_times + self._skip_times]
+            return MessageChain._trusted([root[i] for i in positions[self._skip_times :]])
+
         selected = []
         matched_times = 0
         for value in chain.__root__:
@@ -59,4 +69,4 @@ class Components(Decorator, Generic[T]):
                 selected.append(value)
                 matched_times += 1
 
-        return MessageChain.create(selected[self._skip_times :])
+        return MessageChain._trusted(selected[self._skip_times :])
@@ -1,8 +1,7 @@
 import getopt
 import itertools
 import re
-import shlex
-from typing import Dict, List, Sequence
+from typing import TYPE_CHECKING, Dict, Iterator, List, Optional, Sequence, Tuple
 
 from graia.broadcast.entities.dispatcher import BaseDispatcher
 from graia.broadcast.entities.signatures import Force
@@ -13,14 +12,78 @@ from avilla.core.builtins.elements import Text
 from avilla.core.message.chain import MessageChain
 from avilla.core.message.element import Element
 
-from .pattern import BoxParameter, ParamPattern, SwitchParameter
+from .pattern import ParamPattern, SwitchParameter
+
+if TYPE_CHECKING:
+    from .router import LiteratureRouter
 
 BLOCKING_ELEMENTS = ()
 
+_ELEMENT_ID_ESCAPE = re.compile(r"\$(?P<id>\d+)")
+_ELEMENT_ID_SPLIT = re.compile(r"((?<!\\)\$[0-9]+)")
+
+# 与 shlex.split(posix=True) 等价的分词规则
+_SHELL_TOKEN = re.compile(
+    r"(?P<space>[ \t\r\n]+)"
+    r"|(?P<plain>[^ \t\r\n'\"\\]+)"
+    r"|'(?P<single>[^']*)'"
+    r"|\"(?P<double>(?:[^\"\\]|\\.)*)\""
+    r"|\\(?P<escaped>.)",
+    re.S,
+)
+_DOUBLE_QUOTED_ESCAPE = re.compile(r'\\(["\\])')
+
+
+def shell_split(string: str) -> List[str]:
+    """单次扫描的分词器, 行为与 `shlex.split(string)` 保持一致."""
+    result: List[str] = []
+    token: List[str] = []
+    in_token = False
+    position = 0
+    length = len(string)
+    match = _SHELL_TOKEN.match
+    while position < length:
+        matched = match(string, position)
+        if matched is None:
+            # 未闭合的双引号内, 末尾奇数个反斜杠中的最后一个转义的是 EOF, shlex 对此报告 "No escaped character"
+            if string[position] == "\\" or (
+                string[position] == '"' and (length - len(string.rstrip("\\"))) % 2
+            ):
+                raise ValueError("No escaped character")
+            raise ValueError("No closing quotation")
+        kind = matched.lastgroup
+        if kind == "space":
+            if in_token:
+                result.append("".join(token))
+                token.clear()
+                in_token = False
+        elif kind == "double":
+            token.append(_DOUBLE_QUOTED_ESCAPE.sub(r"\1", matched.group(kind)))
+            in_token = True
+        else:
+            token.append(matched.group(kind))
+            in_token = True
+        position = matched.end()
+    if in_token:
+        result.append("".join(token))
+    return result
+
+
+def join_frames(chain_frames: Sequence[MessageChain]) -> MessageChain:
+    """将 `split(" ", raw_string=True)` 得到的片段重新以空格连接为一条合并后的消息链."""
+    return MessageChain._trusted(
+        list(itertools.chain(*[[*i.__root__, Text(" ")] for i in chain_frames]))[:-1]
+    ).as_merged()
+
 
 class Literature(BaseDispatcher):
     """旅途的浪漫
     Avilla Migrated> 如果使用中发现任何属因移植过程发生的错误, 提交 issue.
+
+    所有与参数定义相关的表(短/长选项表, 长选项的前缀表, 缺省值)都在实例化时预先编译,
+    `parse_message` 只需扫描一次消息.
+
+    传入 `router` 时, 前缀匹配交由共享的 `LiteratureRouter` 完成, 每个事件只切分与匹配一次.
     """
 
     always = False
@@ -29,6 +92,15 @@ class Literature(BaseDispatcher):
 
     allow_quote: bool
     skip_one_at_in_quote: bool
+    router: Optional["LiteratureRouter"]
+
+    # 编译产物: 选项 -> (参数名, 是否需要值)
+    _short_table: Dict[str, Tuple[str, bool]]
+    # 长选项的所有前缀 -> 完整的长选项名, 为 None 时表示该前缀有歧义
+    _long_prefix_table: Dict[str, Optional[str]]
+    _long_table: Dict[str, Tuple[str, bool]]
+    _switch_values: Dict[str, bool]
+    _defaults: List[Tuple[str, ParamPattern]]
 
     def __init__(
         self,
@@ -36,11 +108,43 @@ class Literature(BaseDispatcher):
         arguments: Dict[str, ParamPattern] = None,
         allow_quote: bool = False,
         skip_one_at_in_quote: bool = False,
+        router: Optional["LiteratureRouter"] = None,
     ) -> None:
         self.prefixs = prefixs
         self.arguments = arguments or {}
         self.allow_quote = allow_quote
         self.skip_one_at_in_quote = skip_one_at_in_quote
+        self.compile()
+        self.router = router
+        if router is not None:
+            router.register(self)
+
+    def compile(self) -> None:
+        """根据 `arguments` 重新生成解析时使用的各种表, 修改 `arguments` 后需要手动调用."""
+        self._short_table = {
+            short: (param_name, not isinstance(self.arguments[param_name], SwitchParameter))
+            for short, param_name in self.gen_short_map().items()
+        }
+        self._long_table = {
+            long: (param_name, not isinstance(self.arguments[param_name], SwitchParameter))
+            for long, param_name in self.gen_long_map().items()
+        }
+        candidates: Dict[str, List[str]] = {}
+        for long in self._long_table:
+            for end in range(len(long) + 1):
+                candidates.setdefault(long[:end], []).append(long)
+        self._long_prefix_table = {
+            prefix: prefix if prefix in self._long_table else (longs[0] if len(longs) == 1 else None)
+            for prefix, longs in candidates.items()
+        }
+        self._switch_values = {
+            param_name: (arg.auto_reverse and not arg.default or True)  # type: ignore
+            for param_name, arg in self.arguments.items()
+            if isinstance(arg, SwitchParameter)
+        }
+        self._defaults = [
+            (param_name, arg) for param_name, arg in self.arguments.items() if arg.default is not None
+        ]
 
     def trans_to_map(self, message_chain: MessageChain):
         string_result: List[str] = []
@@ -48,13 +152,7 @@ class Literature(BaseDispatcher):
 
         for elem in message_chain.__root__:
             if isinstance(elem, Text):
-                string_result.append(
-                    re.sub(
-                        r"\$(?P<id>\d+)",
-                        lambda match: f'\\${match.group("id")}',
-                        elem.text,
-                    )
-                )
+                string_result.append(_ELEMENT_ID_ESCAPE.sub(r"\\$\g<id>", elem.text))
             else:
                 index = len(id_elem_map) + 1
                 string_result.append(f"${index}")
@@ -74,6 +172,8 @@ class Literature(BaseDispatcher):
     def gen_short_map(self):
         result = {}
         for param_name, arg in self.arguments.items():
+            if arg.short is None:
+                continue
             if arg.short in result:
                 raise ValueError("conflict item")
             result[arg.short] = param_name
@@ -85,94 +185,113 @@ class Literature(BaseDispatcher):
     def gen_short_map_with_bar(self):
         return {("-" + k): v for k, v in self.gen_short_map().items() if k is not None}
 
+    @staticmethod
+    def _to_chain(value: str, id_elem_map: Dict[int, Element]) -> MessageChain:
+        # split 的结果中奇数位总是元素占位符, 偶数位的文本之间不会相邻, 无需再 as_merged.
+        result: List[Element] = []
+        for index, piece in enumerate(_ELEMENT_ID_SPLIT.split(value)):
+            if index % 2:
+                result.append(id_elem_map[int(piece[1:])])
+            elif piece:
+                result.append(Text(piece))
+        return MessageChain._trusted(result)
+
+    def parse_options(self, args: List[str]) -> Tuple[List[Tuple[str, str]], List[str]]:
+        """与 `getopt.getopt` 行为一致, 但直接使用预编译的表, 返回 (参数名, 值) 的列表."""
+        options: List[Tuple[str, str]] = []
+        position = 0
+        count = len(args)
+        while position < count:
+            arg = args[position]
+            if not arg.startswith("-") or arg == "-":
+                break
+            position += 1
+            if arg == "--":
+                break
+            if arg.startswith("--"):
+                opt, sep, optarg = arg[2:].partition("=")
+                if opt not in self._long_prefix_table:
+                    raise getopt.GetoptError(f"option --{opt} not recognized", opt)
+                long = self._long_prefix_table[opt]
+                if long is None:
+                    raise getopt.GetoptError(f"option --{opt} not a unique prefix", opt)
+                param_name, has_arg = self._long_table[long]
+                if has_arg:
+                    if not sep:
+                        if position >= count:
+                            raise getopt.GetoptError(f"option --{long} requires argument", long)
+                        optarg = args[position]
+                        position += 1
+                elif sep:
+                    raise getopt.GetoptError(f"option --{long} must not have an argument", long)
+                options.append((param_name, optarg))
+                continue
+            optstring = arg[1:]
+            while optstring:
+                opt, optstring = optstring[0], optstring[1:]
+                if opt not in self._short_table:
+                    raise getopt.GetoptError(f"option -{opt} not recognized", opt)
+                param_name, has_arg = self._short_table[opt]
+                if has_arg:
+                    if not optstring:
+                        if position >= count:
+                            raise getopt.GetoptError(f"option -{opt} requires argument", opt)
+                        optstring = args[position]
+                        position += 1
+                    optarg, optstring = optstring, ""
+                else:
+                    optarg = ""
+                options.append((param_name, optarg))
+        return options, args[position:]
+
     def parse_message(self, message_chain: MessageChain):
         string_result, id_elem_map = self.trans_to_map(message_chain)
 
-        parsed_args, variables = getopt.getopt(
-            shlex.split(string_result),
-            "".join(
-                [
-                    arg.short if isinstance(arg, SwitchParameter) else (arg.short + ":")
-                    for arg in self.arguments.values()
-                    if arg.short
-                ]
-            ),
-            [
-                long if isinstance(arg, SwitchParameter) else long + "="
-                for arg in self.arguments.values()
-                for long in arg.longs
-            ],
-        )
-        map_with_bar = {**self.gen_long_map_with_bar(), **self.gen_short_map_with_bar()}
-        parsed_args = {
-            map_with_bar[k]: (
-                MessageChain.create(
-                    [
-                        Text(i) if not re.match(r"^\$\d+$", i) else id_elem_map[int(i[1:])]
-                        for i in re.split(r"((?<!\\)\$[0-9]+)", v)
-                        if i
-                    ]
-                ).as_merged()
-                if isinstance(self.arguments[map_with_bar[k]], BoxParameter)
-                else (
-                    self.arguments[map_with_bar[k]].auto_reverse  # type: ignore
-                    and not self.arguments[map_with_bar[k]].default
-                    or True
-                ),
-                self.arguments[map_with_bar[k]],
-            )
-            for k, v in parsed_args
-        }
-        variables = [
-            MessageChain.create(
-                [
-                    Text(i) if not re.match(r"^\$\d+$", i) else id_elem_map[int(i[1:])]
-                    for i in re.split(r"((?<!\\)\$[0-9]+)", v)
-                    if i
-                ]
-            ).as_merged()
-            for v in variables
-        ]
-        for param_name, argument_setting in self.arguments.items():
-            if param_name not in parsed_args:
-                print(argument_setting)
-                if argument_setting.default is not None:
-                    parsed_args[param_name] = (
-                        argument_setting.default,
-                        argument_setting,
-                    )
-                else:
-                    raise ExecutionStop()
+        options, remains = self.parse_options(shell_split(string_result))
+        parsed_args = {}
+        for param_name, value in options:
+            argument = self.arguments[param_name]
+            if param_name in self._switch_values:
+                parsed_args[param_name] = (self._switch_values[param_name], argument)
+            else:
+                parsed_args[param_name] = (self._to_chain(value, id_elem_map), argument)
+        variables = [self._to_chain(v, id_elem_map) for v in remains]
+        if len(parsed_args) != len(self.arguments):
+            for param_name, argument_setting in self._defaults:
+                if param_name not in parsed_args:
+                    parsed_args[param_name] = (argument_setting.default, argument_setting)
+            if len(parsed_args) != len(self.arguments):
+                raise ExecutionStop()
 
         return (parsed_args, variables)
 
     def prefix_match(self, target_chain: MessageChain):
         target_chain = target_chain.as_merged()
 
-        chain_frames: List[MessageChain] = target_chain.split(" ", raw_string=True)
+        chain_frames: Iterator[MessageChain] = target_chain.iter_split(" ", raw_string=True)
 
-        # 前缀匹配
-        if len(self.prefixs) > len(chain_frames):
-            return
-        for index, current_prefix in enumerate(self.prefixs):
-            current_frame = chain_frames[index]
+        # 前缀匹配, 只会切分出与前缀数量相同的片段
+        for current_prefix in self.prefixs:
+            current_frame = next(chain_frames, None)
+            if current_frame is None:
+                return
             if not current_frame.__root__ or type(current_frame.__root__[0]) is not Text:
                 return
             if current_frame.__root__[0].text != current_prefix:
                 return
 
-        chain_frames = chain_frames[len(self.prefixs) :]
-        return MessageChain.create(
-            list(itertools.chain(*[[*i.__root__, Text(" ")] for i in chain_frames]))[:-1]
-        ).as_merged()
+        return join_frames(list(chain_frames))
 
     async def beforeExecution(self, interface: DispatcherInterface):
         message_chain: MessageChain = await interface.lookup_param(
             "__literature_messagechain__", MessageChain, None, [[], 0]
         )
-        if set([i.__class__ for i in message_chain.__root__]).intersection(BLOCKING_ELEMENTS):
+        if any(message_chain.has(i) for i in BLOCKING_ELEMENTS):
             raise ExecutionStop()
-        noprefix = self.prefix_match(message_chain)
+        if self.router is not None:
+            noprefix = self.router.lookup(message_chain, self)
+        else:
+            noprefix = self.prefix_match(message_chain)
         if noprefix is None:
             raise ExecutionStop()
 
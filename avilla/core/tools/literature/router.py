@@ -0,0 +1,130 @@
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Dict, Iterator, List, Optional
+
+from avilla.core.builtins.elements import Text
+from avilla.core.message.chain import MessageChain
+
+from . import join_frames
+
+if TYPE_CHECKING:
+    from . import Literature
+
+
+@dataclass
+class RouterStats:
+    routed: int = 0  # 实际进行了切分与匹配的消息链数量
+    matched: int = 0
+    rejected: int = 0
+
+
+class _TrieNode:
+    __slots__ = ("children", "literatures")
+
+    children: Dict[str, "_TrieNode"]
+    literatures: List["Literature"]
+
+    def __init__(self) -> None:
+        self.children = {}
+        self.literatures = []
+
+
+class _RouteResult:
+    __slots__ = ("frames", "remains", "matched", "noprefix")
+
+    frames: List[MessageChain]  # 匹配过程中已经切分出的片段
+    remains: Optional[Iterator[MessageChain]]  # 尚未切分的部分
+    matched: Dict["Literature", int]  # Literature -> 匹配的前缀深度
+    noprefix: Dict[int, MessageChain]
+
+    def __init__(
+        self, frames: List[MessageChain], remains: Iterator[MessageChain], matched: Dict["Literature", int]
+    ) -> None:
+        self.frames = frames
+        self.remains = remains
+        self.matched = matched
+        self.noprefix = {}
+
+    def get(self, literature: "Literature") -> Optional[MessageChain]:
+        depth = self.matched.get(literature)
+        if depth is None:
+            return None
+        result = self.noprefix.get(depth)
+        if result is None:
+            if self.remains is not None:
+                self.frames.extend(self.remains)
+                self.remains = None
+            result = self.noprefix[depth] = join_frames(self.frames[depth:])
+        return result
+
+
+class LiteratureRouter:
+    """多个 Literature 共享的前缀路由.
+
+    同一事件的消息链只会被合并, 切分一次, 然后沿着由各个 Literature 的 `prefixs` 构成的前缀树匹配;
+    结果缓存在消息链对象上 (`MessageChain._route`), 同一事件的其余 Literature 在 `beforeExecution` 中
+    以 O(1) 的代价取得结果. 消息链被修改 (`plus`, `invalidate`) 或注册的 Literature 变化后会重新路由.
+    """
+
+    root: _TrieNode
+    stats: RouterStats
+
+    _version: object  # 注册或注销 Literature 时替换, 使消息链上缓存的旧结果失效
+
+    def __init__(self) -> None:
+        self.root = _TrieNode()
+        self.stats = RouterStats()
+        self._version = object()
+
+    def register(self, literature: "Literature") -> None:
+        node = self.root
+        for prefix in literature.prefixs:
+            child = node.children.get(prefix)
+            if child is None:
+                child = node.children[prefix] = _TrieNode()
+            node = child
+        node.literatures.append(literature)
+        self._version = object()
+
+    def unregister(self, literature: "Literature") -> None:
+        node = self.root
+        for prefix in literature.prefixs:
+            node = node.children[prefix]
+        node.literatures.remove(literature)
+        self._version = object()
+
+    def route(self, message_chain: MessageChain) -> _RouteResult:
+        cached = message_chain._route
+        if cached is not None and cached[0] is self._version:
+            return cached[1]
+
+        remains = message_chain.as_merged().iter_split(" ", raw_string=True)
+        frames: List[MessageChain] = []
+        matched = {literature: 0 for literature in self.root.literatures}
+        node = self.root
+        while node.children:
+            frame = next(remains, None)
+            if frame is None:
+                break
+            frames.append(frame)
+            root = frame.__root__
+            if not root or type(root[0]) is not Text:
+                break
+            node = node.children.get(root[0].text)  # type: ignore
+            if node is None:
+                break
+            for literature in node.literatures:
+                matched[literature] = len(frames)
+
+        result = _RouteResult(frames, remains, matched)
+        self.stats.routed += 1
+        message_chain._route = (self._version, result)
+        return result
+
+    def lookup(self, message_chain: MessageChain, literature: "Literature") -> Optional[MessageChain]:
+        """返回去除前缀后的消息链, 前缀不匹配时返回 None, 与 `Literature.prefix_match` 一致."""
+        result = self.route(message_chain).get(literature)
+        if result is None:
+            self.stats.rejected += 1
+        else:
+            self.stats.matched += 1
+        return result
@@ -0,0 +1,122 @@
+import json
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+
+@dataclass(frozen=True)
+class JsonCodec:
+    """一组 JSON 编解码函数.
+
+    `dumpb`/`loadb` 直接在对象与 UTF-8 bytes 之间转换; 后端支持时不会产生中间的 str.
+    """
+
+    name: str
+    dumps: Callable[[Any], str]
+    loads: Callable[[Union[str, bytes]], Any]
+    dumpb: Callable[[Any], bytes]
+    loadb: Callable[[bytes], Any]
+
+
+def _stdlib_codec() -> JsonCodec:
+    return JsonCodec(
+        "json",
+        json.dumps,
+        json.loads,
+        # 标准库没有直接产出/读取 bytes 的路径; json.loads 虽然接受 bytes, 但要先探测编码, 反而更慢
+        lambda obj: json.dumps(obj).encode("utf-8"),
+        lambda data: json.loads(data.decode("utf-8")),
+    )
+
+
+def _orjson_codec() -> JsonCodec:
+    import orjson
+
+    return JsonCodec(
+        "orjson",
+        lambda obj: orjson.dumps(obj).decode("utf-8"),
+        orjson.loads,
+        orjson.dumps,
+        orjson.loads,
+    )
+
+
+def _ujson_codec() -> JsonCodec:
+    import ujson
+
+    return JsonCodec(
+        "ujson",
+        ujson.dumps,
+        ujson.loads,
+        # 与 dumps 一样转义非 ASCII 字符, 同一对象经 dumps 与 dumpb 得到的内容相同 (与 json, orjson 一致)
+        lambda obj: ujson.dumps(obj).encode("utf-8"),
+        ujson.loads,
+    )
+
+
+# 名称 -> (优先级, 工厂); 工厂在第一次使用时才被调用, 未安装对应后端时抛出 ImportError.
+_factories: Dict[str, Tuple[int, Callable[[], JsonCodec]]] = {
+    "orjson": (100, _orjson_codec),
+    "ujson": (50, _ujson_codec),
+    "json": (0, _stdlib_codec),
+}
+_loaded: Dict[str, Optional[JsonCodec]] = {}
+
+# 作为后端名称时表示可用后端中优先级最高的一个
+AUTO = "auto"
+
+# 默认使用标准库 json, 以免输出 (非 ASCII 字符的转义, NaN 等) 随安装的包而改变; 需要时通过 set_default_codec 选用
+_default: str = "json"
+_auto: Optional[JsonCodec] = None  # 自动选择的结果
+
+
+def register_codec(name: str, factory: Callable[[], JsonCodec], priority: int = 0) -> None:
+    "注册一个 JSON 后端; 以 AUTO 选择后端时, 使用可用后端中优先级最高的一个."
+    global _auto
+
+    _factories[name] = (priority, factory)
+    _loaded.pop(name, None)
+    _auto = None
+
+
+def _load(name: str) -> Optional[JsonCodec]:
+    if name not in _loaded:
+        try:
+            _loaded[name] = _factories[name][1]()
+        except ImportError:
+            _loaded[name] = None
+    return _loaded[name]
+
+
+def available_codecs() -> List[JsonCodec]:
+    "按优先级降序排列的可用后端."
+    names = sorted(_factories, key=lambda name: _factories[name][0], reverse=True)
+    return [codec for codec in map(_load, names) if codec is not None]
+
+
+def set_default_codec(name: Optional[str]) -> None:
+    "指定默认后端, AUTO 为自动选择; 为 None 时恢复为标准库 json."
+    global _default
+
+    if name is None:
+        name = "json"
+    elif name != AUTO:
+        if name not in _factories:
+            raise KeyError(f"unknown json codec: {name}")
+        if _load(name) is None:
+            raise ImportError(f"json codec {name} is not available")
+    _default = name
+
+
+def get_codec(name: Optional[str] = None) -> JsonCodec:
+    global _auto
+
+    if name is None:
+        name = _default
+    if name == AUTO:
+        if _auto is None:
+            _auto = available_codecs()[0]
+        return _auto
+    codec = _load(name)
+    if codec is None:
+        raise ImportError(f"json codec {name} is not available")
+    return codec
@@ -1,5 +1,8 @@
+import codecs
 import json
-from typing import Any, Callable
+from typing import Any, AsyncIterator, Callable, Optional
+
+from avilla.core.transformers.codec import get_codec
 
 
 def u8_string(binary: bytes) -> str:
@@ -32,3 +35,68 @@ def json_decode(json_decoder: Callable[[str], Any] = json.loads):
         return json_decoder(json_string)
 
     return decoder
+
+
+def json_encode_bytes(codec: Optional[str] = None):
+    "对象 -> UTF-8 bytes, 相当于 json_encode 后再 u8_encode, 但后端支持时不经过 str."
+    return get_codec(codec).dumpb
+
+
+def json_decode_bytes(codec: Optional[str] = None):
+    "UTF-8 bytes -> 对象, 相当于 u8_string 后再 json_decode, 但不经过 str."
+    return get_codec(codec).loadb
+
+
+# 以下为 ChunkStream 使用的分块版本, 均接受并返回异步迭代器.
+
+
+def binary_decode_chunks(pattern: str):
+    "逐块解码; 跨越块边界的多字节字符会被正确地拼接."
+
+    async def decoder(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+        incremental = codecs.getincrementaldecoder(pattern)()
+        async for chunk in chunks:
+            text = incremental.decode(chunk)
+            if text:
+                yield text
+        text = incremental.decode(b"", final=True)
+        if text:
+            yield text
+
+    return decoder
+
+
+def u8_string_chunks():
+    return binary_decode_chunks("utf-8")
+
+
+def json_lines_decode(json_decoder: Callable[[str], Any] = json.loads):
+    "将按行分隔的 JSON (JSON Lines) 文本流逐行解码, 每解出一个值即产出一个."
+
+    async def decoder(chunks: AsyncIterator[str]) -> AsyncIterator[Any]:
+        pending = []  # 尚未遇到换行的部分, 最后一次性拼接
+        async for chunk in chunks:
+            if "\n" not in chunk:
+                pending.append(chunk)
+                continue
+            lines = chunk.split("\n")
+            pending.append(lines[0])
+            lines[0] = "".join(pending)
+            pending = [lines.pop()]
+            for line in lines:
+                if line.strip():
+                    yield json_decoder(line)
+        line = "".join(pending)
+        if line.strip():
+            yield json_decoder(line)
+
+    return decoder
+
+
+def json_collect_decode(json_decoder: Callable[[str], Any] = json.loads):
+    "收集整个文本流后一次性解码为单个值; 只拼接一次, 避免逐块拼接字符串的二次方开销."
+
+    async def decoder(chunks: AsyncIterator[str]) -> AsyncIterator[Any]:
+        yield json_decoder("".join([chunk async for chunk in chunks]))
+
+    return decoder
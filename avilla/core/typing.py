@@ -10,9 +10,6 @@ from typing import (
     Union,
 )
 
-from avilla.core.contactable import Contactable
-from avilla.core.mainline import Mainline
-
 if TYPE_CHECKING:
     from avilla.core.builtins.profile import GroupProfile
     from avilla.core.execution import Execution
@@ -0,0 +1,156 @@
+import hashlib
+import json
+from abc import ABCMeta, abstractmethod
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Dict, Optional, Union
+
+import aiofiles
+
+
+@dataclass
+class CachedResponse:
+    content: bytes
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+
+    @property
+    def revalidate_headers(self) -> Dict[str, str]:
+        "重新验证时附加的条件请求头."
+        headers = {}
+        if self.etag is not None:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified is not None:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class HttpCache(metaclass=ABCMeta):
+    """以 URL 为键的响应内容缓存, 供 HttpGetProvider 使用.
+
+    只有带有 ETag 或 Last-Modified 的响应会被缓存, 每次使用前都会向服务端发送条件请求重新验证,
+    因此缓存只节省传输, 不会返回过期的内容.
+    """
+
+    @abstractmethod
+    async def get(self, url: str) -> Optional[CachedResponse]:
+        ...
+
+    @abstractmethod
+    async def set(self, url: str, response: CachedResponse) -> None:
+        ...
+
+    @abstractmethod
+    async def discard(self, url: str) -> None:
+        ...
+
+
+class MemoryHttpCache(HttpCache):
+    "保存在内存中的 LRU 缓存, 总大小不超过 `max_bytes`."
+
+    max_bytes: int
+    size: int
+    _entries: "OrderedDict[str, CachedResponse]"
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024) -> None:
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._entries = OrderedDict()
+
+    async def get(self, url: str) -> Optional[CachedResponse]:
+        response = self._entries.get(url)
+        if response is not None:
+            self._entries.move_to_end(url)
+        return response
+
+    async def set(self, url: str, response: CachedResponse) -> None:
+        await self.discard(url)
+        if len(response.content) > self.max_bytes:
+            return
+        self._entries[url] = response
+        self.size += len(response.content)
+        while self.size > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self.size -= len(evicted.content)
+
+    async def discard(self, url: str) -> None:
+        response = self._entries.pop(url, None)
+        if response is not None:
+            self.size -= len(response.content)
+
+
+class DiskHttpCache(HttpCache):
+    """保存在 `directory` 下的 LRU 缓存, 总大小不超过 `max_bytes`.
+
+    每个 URL 对应以其 sha256 命名的内容文件与 `.json` 元数据文件; 索引在构造时从目录中重建.
+    """
+
+    directory: Path
+    max_bytes: int
+    size: int
+    _index: "OrderedDict[str, int]"  # 文件名 -> 内容大小, 按最近使用排序
+
+    def __init__(self, directory: Union[Path, str], max_bytes: int = 512 * 1024 * 1024) -> None:
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._index = OrderedDict()
+        for path in sorted(self.directory.glob("*.json"), key=lambda path: path.stat().st_mtime):
+            content = path.with_suffix("")
+            if content.exists():
+                self._index[content.name] = content.stat().st_size
+                self.size += content.stat().st_size
+
+    @staticmethod
+    def _key(url: str) -> str:
+        return hashlib.sha256(url.encode()).hexdigest()
+
+    async def get(self, url: str) -> Optional[CachedResponse]:
+        key = self._key(url)
+        if key not in self._index:
+            return None
+        content_path = self.directory / key
+        try:
+            async with aiofiles.open(str(content_path.with_suffix(".json")), "r") as f:
+                meta = json.loads(await f.read())
+            async with aiofiles.open(str(content_path), "rb") as f:
+                content = await f.read()
+        except (OSError, ValueError):
+            await self.discard(url)
+            return None
+        self._index.move_to_end(key)
+        return CachedResponse(content, meta.get("etag"), meta.get("last_modified"))
+
+    async def set(self, url: str, response: CachedResponse) -> None:
+        await self.discard(url)
+        if len(response.content) > self.max_bytes:
+            return
+        key = self._key(url)
+        content_path = self.directory / key
+        meta = asdict(response)
+        del meta["content"]
+        meta["url"] = url
+        async with aiofiles.open(str(content_path), "wb") as f:
+            await f.write(response.content)
+        async with aiofiles.open(str(content_path.with_suffix(".json")), "w") as f:
+            await f.write(json.dumps(meta))
+        self._index[key] = len(response.content)
+        self.size += len(response.content)
+        while self.size > self.max_bytes:
+            evicted, size = self._index.popitem(last=False)
+            self._remove(evicted)
+            self.size -= size
+
+    async def discard(self, url: str) -> None:
+        key = self._key(url)
+        size = self._index.pop(key, None)
+        if size is not None:
+            self.size -= size
+            self._remove(key)
+
+    def _remove(self, key: str) -> None:
+        content_path = self.directory / key
+        content_path.unlink(missing_ok=True)
+        content_path.with_suffix(".json").unlink(missing_ok=True)
@@ -1,33 +1,100 @@
-from typing import Any, Awaitable, Callable, Dict, Generic, List, Type, TypeVar
+import asyncio
+from inspect import CORO_CREATED, getcoroutinestate, isawaitable, iscoroutine, iscoroutinefunction
+from typing import Any, Awaitable, Callable, Dict, Generic, List, Tuple, Type, TypeVar, Union
 
 from avilla.core.message.chain import MessageChain
 from avilla.core.message.element import Element
+from avilla.core.resource import Resource
 from avilla.core.typing import T_Protocol
 
 T = TypeVar("T", bound=Element)
 
+T_Serializer = Callable[[Any], Union[Awaitable[Any], Any]]
+
 
 class MessageSerializeBus(Generic[T_Protocol]):
-    message_serializers: Dict[Type[Element], Callable[[Any], Awaitable[Any]]]
+    """按元素类型分发的消息序列化器.
+
+    序列化器可以是同步函数, 也可以是异步函数; 查找时沿元素类型的 MRO 进行, 结果按类型缓存.
+    """
+
+    message_serializers: Dict[Type[Element], T_Serializer]
+
+    # 元素类型 -> (序列化器, 是否为协程函数)
+    _dispatch_cache: Dict[Type[Element], Tuple[T_Serializer, bool]]
 
     def __init__(self) -> None:
         self.message_serializers = {}
+        self._dispatch_cache = {}
 
     def register(self, message_type: Type[T]):
         def wrapper(func: Callable[[T], Any]):
             self.message_serializers[message_type] = func
+            self._dispatch_cache.clear()
             return func
 
         return wrapper
 
+    def resolve(self, message_type: Type[Element]) -> Tuple[T_Serializer, bool]:
+        cached = self._dispatch_cache.get(message_type)
+        if cached is not None:
+            return cached
+        for klass in message_type.__mro__:
+            serializer = self.message_serializers.get(klass)
+            if serializer is not None:
+                cached = self._dispatch_cache[message_type] = (serializer, iscoroutinefunction(serializer))
+                return cached
+        raise ValueError(f"[{message_type}] cannot be serialized.")
+
     async def serialize(self, message: MessageChain) -> List[Any]:
         result = []
 
-        for element in message.__root__:
-            message_type = element.__class__
-            if message_type in self.message_serializers:
-                result.append(await self.message_serializers[message_type](element))
-            else:
-                raise ValueError(f"[{message_type}] cannot be serialized.")
+        for element in message:
+            serializer, is_coroutine = self.resolve(element.__class__)
+            value = serializer(element)
+            if is_coroutine or isawaitable(value):
+                value = await value
+            result.append(value)
+
+        return result
+
+    async def serialize_batch(self, message: MessageChain, concurrency: int = 8) -> List[Any]:
+        """与 `serialize` 相同, 但需要读取 Provider 的资源元素(Image, Voice, Video 等)会被并发序列化,
+        同时进行的数量不超过 `concurrency`; 返回结果的顺序与消息链中元素的顺序一致.
+        """
+        result: List[Any] = []
+        pending: List[Tuple[int, "asyncio.Task[Any]"]] = []
+        started: List[Awaitable[Any]] = []
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def bounded(awaitable: Awaitable[Any]) -> Any:
+            async with semaphore:
+                return await awaitable
+
+        try:
+            for element in message:
+                serializer, is_coroutine = self.resolve(element.__class__)
+                value = serializer(element)
+                if is_coroutine or isawaitable(value):
+                    if isinstance(element, Resource):
+                        started.append(value)
+                        pending.append((len(result), asyncio.ensure_future(bounded(value))))
+                        result.append(None)
+                        continue
+                    value = await value
+                result.append(value)
+
+            values = await asyncio.gather(*(task for _, task in pending))
+        except BaseException:
+            # 等待被取消的任务真正结束, 并取出其余任务的异常; 尚未开始的任务中的协程需要手动关闭
+            for _, task in pending:
+                task.cancel()
+            await asyncio.gather(*(task for _, task in pending), return_exceptions=True)
+            for awaitable in started:
+                if iscoroutine(awaitable) and getcoroutinestate(awaitable) == CORO_CREATED:
+                    awaitable.close()
+            raise
+        for (index, _), value in zip(pending, values):
+            result[index] = value
 
         return result
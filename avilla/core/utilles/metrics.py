@@ -0,0 +1,71 @@
+import bisect
+from typing import Dict, Iterable, List, Tuple
+
+# 单位为秒
+DEFAULT_LATENCY_BUCKETS: Tuple[float, ...] = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+
+class LatencyHistogram:
+    """固定分桶的延迟直方图 (与 Prometheus 的 histogram 相同的累积语义), 记录一次观测的开销为 O(log n).
+
+    `errors` 记录没有得到结果 (连接失败, 超时等) 的次数, 这些请求不计入分桶.
+    """
+
+    __slots__ = ("buckets", "counts", "count", "total", "errors")
+
+    buckets: Tuple[float, ...]
+    counts: List[int]  # 最后一项为超过最大上界的数量
+    count: int
+    total: float
+    errors: int
+
+    def __init__(self, buckets: Iterable[float] = DEFAULT_LATENCY_BUCKETS) -> None:
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.errors = 0
+
+    def observe(self, seconds: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def quantile(self, q: float) -> float:
+        "按分桶线性插值估计分位数; 落在最后一个 (无上界) 分桶时返回最大上界."
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        lower = 0.0
+        for upper, bucket_count in zip(self.buckets, self.counts):
+            if bucket_count and seen + bucket_count >= rank:
+                return lower + (upper - lower) * (rank - seen) / bucket_count
+            seen += bucket_count
+            lower = upper
+        return self.buckets[-1] if self.buckets else 0.0
+
+    def cumulative(self) -> Dict[float, int]:
+        "上界 -> 不超过该上界的观测数量, 包括 `inf`."
+        result = {}
+        seen = 0
+        for upper, bucket_count in zip((*self.buckets, float("inf")), self.counts):
+            seen += bucket_count
+            result[upper] = seen
+        return result
@@ -1,4 +1,5 @@
-from typing import TYPE_CHECKING, Any, Callable, Dict, Generic, Optional
+from typing import TYPE_CHECKING, Any, Callable, Dict, Generic, List, Optional, Tuple
+from weakref import WeakKeyDictionary
 
 from immutables import Map
 
@@ -14,12 +15,31 @@ class OverrideException(Exception):
     pass
 
 
+_LEAF = object()
+
+
+def static_subbus(subbus: T_SubBus) -> T_SubBus:
+    "声明该 subbus 的结果只取决于 protocol, OverrideBus 会按 protocol 缓存它的结果."
+    subbus.__static_subbus__ = True  # type: ignore
+    return subbus
+
+
 class OverrideBus(Generic[T_Protocol]):
-    "specially for [BaseProtocol.ensure_execution]"
+    """specially for [BaseProtocol.ensure_execution]
+
+    每次 `override` 时都会将签名编入一棵按 `pattern` 中各维度逐级展开的决策树 (嵌套的 dict),
+    执行时逐级计算 subbus 并查表, 任一维度未命中即可提前结束.
+    """
+
     param_receiver: Callable
     overrides: Dict[Map, Callable]
     pattern: Dict[str, T_SubBus]
     default_factories: Dict[str, Callable]
+    hits: Dict[Map, int]
+    misses: int
+
+    _tree: Dict[Any, Any]
+    _dimensions: List[Tuple[str, T_SubBus, Optional["WeakKeyDictionary[Any, Any]"]]]
 
     def __init__(
         self,
@@ -31,25 +51,68 @@ class OverrideBus(Generic[T_Protocol]):
         self.pattern = pattern
         self.default_factories = default_factories or {}
         self.overrides = {}
+        self.hits = {}
+        self.misses = 0
+        self._tree = {}
+        self._dimensions = [
+            (name, subbus, WeakKeyDictionary() if getattr(subbus, "__static_subbus__", False) else None)
+            for name, subbus in pattern.items()
+        ]
+
+    def _signature(self, protocol: T_Protocol, params: Dict[str, Any]) -> Map:
+        return Map(**{name: subbus(protocol, params) for name, subbus in self.pattern.items()})
 
     def __call__(self, protocol: T_Protocol, *args: Any, **kwargs: Any) -> Any:
         params = self.param_receiver(*args, **kwargs)
-        current_sign = Map(**{name: subbus(protocol, params) for name, subbus in self.pattern.items()})
-        selected = self.overrides.get(current_sign)
-        if selected is None:
-            raise OverrideException("No override found for {}".format(current_sign))
+        node = self._tree
+        for _, subbus, static_cache in self._dimensions:
+            if static_cache is None:
+                value = subbus(protocol, params)
+            else:
+                try:
+                    value = static_cache[protocol]
+                except KeyError:
+                    value = static_cache[protocol] = subbus(protocol, params)
+            node = node.get(value)
+            if node is None:
+                break
+        else:
+            node = node.get(_LEAF)
+        if node is None:
+            self.misses += 1
+            raise OverrideException("No override found for {}".format(self._signature(protocol, params)))
+        selected, sign = node
+        self.hits[sign] += 1
         return selected(protocol, **params)
 
     def override(self, **pattern):
         def decorator(func):
-            self.overrides[
-                Map(
-                    **{
-                        k: pattern[k] if k in pattern else self.default_factories[k]()
-                        for k in self.pattern.keys()
-                    }
-                )
-            ] = func
+            sign = Map(
+                **{
+                    k: pattern[k] if k in pattern else self.default_factories[k]()
+                    for k in self.pattern.keys()
+                }
+            )
+            self.overrides[sign] = func
+            self.hits.setdefault(sign, 0)
+            node = self._tree
+            for name, _, _ in self._dimensions:
+                node = node.setdefault(sign[name], {})
+            node[_LEAF] = (func, sign)
             return func
 
         return decorator
+
+    def forget_static(self, protocol: T_Protocol) -> None:
+        "丢弃某个 protocol 上缓存的 static subbus 结果, 例如在其 `using_networks` 改变后."
+        for _, _, static_cache in self._dimensions:
+            if static_cache is not None:
+                static_cache.pop(protocol, None)
+
+    def override_stats(self) -> List[Tuple[Map, Callable, int]]:
+        "各个 override 的签名, 实现与被命中的次数, 按命中次数降序排列, 供性能分析使用."
+        return sorted(
+            ((sign, self.overrides[sign], count) for sign, count in self.hits.items()),
+            key=lambda item: item[2],
+            reverse=True,
+        )
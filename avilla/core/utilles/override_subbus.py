@@ -2,12 +2,14 @@ from typing import Any, Dict, Type
 
 from avilla.core.execution import Execution
 from avilla.core.protocol import BaseProtocol
+from avilla.core.utilles.override_bus import static_subbus
 
 
 def proto_ensure_exec_params(execution):
     return {"execution": execution}
 
 
+@static_subbus
 def network_method_subbus(proto: BaseProtocol, params: Dict[str, Any]) -> str:
     if "ws" in proto.using_networks:
         return "ws"
@@ -0,0 +1,182 @@
+import asyncio
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, Generic, Optional, Tuple, TypeVar, Union
+
+import aiofiles
+
+from avilla.core.resource import Resource
+
+T = TypeVar("T")
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    spills: int = 0  # 从内存中淘汰, 但被保存到了磁盘上的数量
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+class ContentStore:
+    """以内容摘要 (sha256) 为键的资源内容缓存.
+
+    内存中的内容总大小不超过 `max_memory_bytes`, 按 LRU 淘汰; 设置了 `spill_directory` 时,
+    被淘汰的内容会写入该目录 (总大小不超过 `max_disk_bytes`), 之后命中时再读回内存.
+    """
+
+    max_memory_bytes: int
+    spill_directory: Optional[Path]
+    max_disk_bytes: int
+    memory_size: int
+    disk_size: int
+    stats: CacheStats
+
+    _memory: "OrderedDict[str, bytes]"
+    _disk: "OrderedDict[str, int]"
+
+    def __init__(
+        self,
+        max_memory_bytes: int = 32 * 1024 * 1024,
+        spill_directory: Union[Path, str, None] = None,
+        max_disk_bytes: int = 512 * 1024 * 1024,
+    ) -> None:
+        self.max_memory_bytes = max_memory_bytes
+        self.spill_directory = Path(spill_directory) if spill_directory is not None else None
+        if self.spill_directory is not None:
+            self.spill_directory.mkdir(parents=True, exist_ok=True)
+        self.max_disk_bytes = max_disk_bytes
+        self.memory_size = 0
+        self.disk_size = 0
+        self.stats = CacheStats()
+        self._memory = OrderedDict()
+        self._disk = OrderedDict()
+
+    def __contains__(self, digest: str) -> bool:
+        return digest in self._memory or digest in self._disk
+
+    async def get(self, digest: str) -> Optional[bytes]:
+        content = self._memory.get(digest)
+        if content is not None:
+            self._memory.move_to_end(digest)
+            self.stats.hits += 1
+            return content
+        if digest in self._disk:
+            async with aiofiles.open(str(self.spill_directory / digest), "rb") as f:  # type: ignore
+                content = await f.read()
+            self._discard_disk(digest)
+            await self.put(digest, content)
+            self.stats.hits += 1
+            return content
+        self.stats.misses += 1
+        return None
+
+    async def put(self, digest: str, content: bytes) -> None:
+        if digest in self._memory:
+            self._memory.move_to_end(digest)
+            return
+        if len(content) > self.max_memory_bytes:
+            await self._spill(digest, content)
+            return
+        self._memory[digest] = content
+        self.memory_size += len(content)
+        while self.memory_size > self.max_memory_bytes:
+            evicted, evicted_content = self._memory.popitem(last=False)
+            self.memory_size -= len(evicted_content)
+            await self._spill(evicted, evicted_content)
+
+    async def fetch(self, resource: Resource) -> Tuple[str, bytes]:
+        "取得资源的摘要与内容, 内容已被缓存时不会再次读取 Provider; 否则只读取一次, 摘要由读到的内容计算."
+        digest = resource.provider.cached_digest()
+        if digest is not None:
+            content = await self.get(digest)
+            if content is not None:
+                return digest, content
+        else:
+            self.stats.misses += 1
+        content, digest = await resource.provider.read_with_digest()
+        await self.put(digest, content)
+        return digest, content
+
+    def discard(self, digest: str) -> None:
+        content = self._memory.pop(digest, None)
+        if content is not None:
+            self.memory_size -= len(content)
+        self._discard_disk(digest)
+
+    async def _spill(self, digest: str, content: bytes) -> None:
+        if self.spill_directory is None or len(content) > self.max_disk_bytes:
+            self.stats.evictions += 1
+            return
+        async with aiofiles.open(str(self.spill_directory / digest), "wb") as f:
+            await f.write(content)
+        self._disk[digest] = len(content)
+        self.disk_size += len(content)
+        self.stats.spills += 1
+        while self.disk_size > self.max_disk_bytes:
+            evicted, _ = next(iter(self._disk.items()))
+            self._discard_disk(evicted)
+            self.stats.evictions += 1
+
+    def _discard_disk(self, digest: str) -> None:
+        size = self._disk.pop(digest, None)
+        if size is not None:
+            self.disk_size -= size
+            (self.spill_directory / digest).unlink(missing_ok=True)  # type: ignore
+
+
+class UploadCache(Generic[T]):
+    """按内容摘要记忆上传结果 (如协议端返回的文件 ID), 相同内容的资源再次发送时不必重新上传.
+
+    同一摘要同时进行的多个上传会被合并为一个; 最多保留 `max_entries` 个结果, 按 LRU 淘汰.
+    上传结果在远端失效时, 协议应调用 `invalidate`.
+    """
+
+    max_entries: int
+    stats: CacheStats
+
+    _results: "OrderedDict[str, T]"
+    _inflight: "Dict[str, asyncio.Future[T]]"
+
+    def __init__(self, max_entries: int = 4096) -> None:
+        self.max_entries = max_entries
+        self.stats = CacheStats()
+        self._results = OrderedDict()
+        self._inflight = {}
+
+    async def get_or_upload(self, resource: Resource, upload: Callable[[Resource], Awaitable[T]]) -> T:
+        digest = await resource.digest()
+        if digest in self._results:
+            self._results.move_to_end(digest)
+            self.stats.hits += 1
+            return self._results[digest]
+
+        inflight = self._inflight.get(digest)
+        if inflight is not None:
+            self.stats.hits += 1
+            return await asyncio.shield(inflight)
+
+        self.stats.misses += 1
+        future = self._inflight[digest] = asyncio.ensure_future(upload(resource))
+        # 结果由回调登记, 发起上传的调用方被取消时, 仍在进行的上传完成后同样会被记录
+        future.add_done_callback(lambda done: self._finish(digest, done))
+        return await asyncio.shield(future)
+
+    def _finish(self, digest: str, future: "asyncio.Future[T]") -> None:
+        if self._inflight.get(digest) is future:
+            del self._inflight[digest]
+        if future.cancelled() or future.exception() is not None:
+            return
+        self._results[digest] = future.result()
+        if len(self._results) > self.max_entries:
+            self._results.popitem(last=False)
+            self.stats.evictions += 1
+
+    def invalidate(self, digest: str) -> None:
+        self._results.pop(digest, None)
@@ -1,4 +1,4 @@
-from typing import Any, Dict
+from typing import Any, Dict, Tuple
 
 
 class SelectorKey:
@@ -43,5 +43,9 @@ class Selector(metaclass=SelectorMeta):
     def to_dict(self):
         return self.path
 
+    def as_key(self) -> Tuple[str, Tuple[Tuple[str, Any], ...]]:
+        "可哈希的表示, 用作字典的键."
+        return (self.scope, tuple(self.path.items()))
+
     def __repr__(self) -> str:
         return f"<{self.scope}>.{'.'.join([f'{k}[{v}]' for k, v in self.path.items()])}"
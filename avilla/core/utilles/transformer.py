@@ -1,7 +1,7 @@
 import abc
-import json
-from typing import Any, Generic, Type
+from typing import Any, Generic, Optional, Type
 
+from avilla.core.transformers.codec import JsonCodec, get_codec
 from avilla.core.typing import T_Origin, T_Receive, T_Value
 
 
@@ -60,5 +60,22 @@ class BytesDecodeTransformer(Transformer[bytes, str]):
 
 
 class JsonTransformer(Transformer[str, Any]):
+    codec: JsonCodec
+
+    def __post_init__(self, codec: Optional[str] = None) -> None:
+        self.codec = get_codec(codec)
+
+    def transform(self) -> Any:
+        return self.codec.loads(self.received.transform())
+
+
+class JsonBytesTransformer(Transformer[bytes, Any]):
+    "直接从 bytes 解码 JSON, 代替 Utf8StringTransformer 与 JsonTransformer 的组合."
+
+    codec: JsonCodec
+
+    def __post_init__(self, codec: Optional[str] = None) -> None:
+        self.codec = get_codec(codec)
+
     def transform(self) -> Any:
-        return json.loads(self.received.transform())
+        return self.codec.loadb(self.received.transform())
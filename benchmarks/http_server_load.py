@@ -0,0 +1,88 @@
+"""AiohttpHttpServer 在本地客户端压测下的吞吐量与延迟.
+
+    python benchmarks/http_server_load.py [--requests N] [--concurrency C] [--max-inflight M] [--work-ms T]
+
+policy 读取请求体, 模拟 T 毫秒的处理 (如投递事件) 后原样写回;
+`--max-inflight` 小于 `--concurrency` 且 T 不为 0 时可以观察到 429 快速拒绝的效果.
+"""
+
+import argparse
+import asyncio
+import socket
+import time
+from typing import List
+
+from aiohttp import ClientSession, TCPConnector
+
+from avilla.core.network.aiohttp.schema import HttpServerSchema
+from avilla.core.network.aiohttp.server import AiohttpHttpServer
+from avilla.core.network.builtins.activities import SetHeader, Write
+from avilla.core.network.builtins.partitions import Read
+from avilla.core.network.service import PolicyProtocol
+
+PAYLOAD = b'{"post_type": "message", "message": [{"type": "text", "data": {"text": "hello"}}]}'
+
+
+class EchoPolicy:
+    def __init__(self, work: float) -> None:
+        self.work = work
+
+    async def on_request(self, protocol: PolicyProtocol) -> None:
+        body = await protocol.partition(Read())
+        if self.work:
+            await asyncio.sleep(self.work)
+        await protocol.apply(SetHeader("Content-Type", "application/json"), Write(body))
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def main(requests: int, concurrency: int, max_inflight: int, work: float):
+    port = free_port()
+    server = AiohttpHttpServer("127.0.0.1", port, max_inflight=max_inflight)
+    server.register_endpoint(HttpServerSchema("/webhook"), EchoPolicy(work))
+    await server.launch_prepare()
+
+    url = f"http://127.0.0.1:{port}/webhook"
+    latencies: List[float] = []
+    statuses = {}
+    remaining = iter(range(requests))
+
+    async with ClientSession(connector=TCPConnector(limit=concurrency)) as session:
+
+        async def client():
+            for _ in remaining:
+                start = time.perf_counter()
+                async with session.post(url, data=PAYLOAD) as resp:
+                    await resp.read()
+                latencies.append(time.perf_counter() - start)
+                statuses[resp.status] = statuses.get(resp.status, 0) + 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*[client() for _ in range(concurrency)])
+        cost = time.perf_counter() - start
+
+    await server.launch_cleanup()
+
+    latencies.sort()
+    histogram = server.latency["/webhook"]
+    print(f"requests={requests} concurrency={concurrency} max_inflight={max_inflight} work={work * 1000}ms")
+    print(f"throughput          {requests / cost:>10.0f} req/s")
+    p50, p99 = latencies[len(latencies) // 2], latencies[int(len(latencies) * 0.99)]
+    print(f"client p50 / p99    {p50 * 1000:>10.2f} / {p99 * 1000:.2f} ms")
+    print(f"server mean         {histogram.mean * 1000:>10.3f} ms")
+    print(f"statuses            {statuses}")
+    print(f"server stats        {server.stats}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--concurrency", type=int, default=256)
+    parser.add_argument("--max-inflight", type=int, default=1024)
+    parser.add_argument("--work-ms", type=float, default=0.0)
+    args = parser.parse_args()
+    asyncio.run(main(args.requests, args.concurrency, args.max_inflight, args.work_ms / 1000))
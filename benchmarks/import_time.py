@@ -0,0 +1,85 @@
+"""`import avilla.core` 等模块在全新解释器中的导入耗时, 并检查较重的依赖没有被提前导入.
+
+    python benchmarks/import_time.py [--budget 毫秒]
+
+每个模块在独立的子进程中导入若干次, 报告耗时的中位数; 任一模块导入失败, 导入后 `sys.modules` 中出现了
+`HEAVY_MODULES` 中不该出现的模块, 或中位数超过 `--budget` 时, 以非零状态码退出, 可用于 CI 中防止回退.
+导入失败的模块会报告其错误, 其余模块照常测量.
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+REPEAT = 7
+
+HEAVY_MODULES = ["rich", "loguru", "aiohttp", "graia.broadcast", "pydantic"]
+
+# 模块 -> 允许它在导入时带入的重依赖
+TARGETS = {
+    "avilla.core": [],
+    "avilla.core.relationship": ["graia.broadcast"],  # avilla.core.context 使用 graia.broadcast 的 Ctx
+    "avilla.core.message.chain": [],
+    "avilla.core.network.aiohttp.service": [],
+    "avilla.core.execution.message": ["pydantic"],
+    "avilla.core.event.message": ["pydantic", "graia.broadcast"],
+}
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+cost = time.perf_counter() - start
+print(json.dumps([cost, [name for name in {heavy!r} if name in sys.modules]]))
+"""
+
+
+class ImportFailed(Exception):
+    pass
+
+
+def measure(module: str):
+    costs = []
+    loaded = []
+    for _ in range(REPEAT):
+        process = subprocess.run(
+            [sys.executable, "-c", PROBE.format(module=module, heavy=HEAVY_MODULES)],
+            capture_output=True,
+            text=True,
+        )
+        if process.returncode != 0:
+            lines = process.stderr.strip().splitlines()
+            raise ImportFailed(lines[-1] if lines else f"exit status {process.returncode}")
+        cost, loaded = json.loads(process.stdout.splitlines()[-1])
+        costs.append(cost)
+    return statistics.median(costs), loaded
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--budget", type=float, default=None, help="avilla.core 导入耗时中位数的上限 (毫秒)")
+    args = parser.parse_args()
+
+    failed = False
+    for module, allowed in TARGETS.items():
+        try:
+            cost, loaded = measure(module)
+        except ImportFailed as e:
+            print(f"{module:<40}{'failed':>10}     {e}")
+            failed = True
+            continue
+        unexpected = [name for name in loaded if name not in allowed]
+        print(f"{module:<40}{cost * 1000:>10.2f} ms  {', '.join(loaded) or '-'}")
+        if unexpected:
+            print(f"  ! {module} eagerly imports {', '.join(unexpected)}")
+            failed = True
+        if module == "avilla.core" and args.budget is not None and cost * 1000 > args.budget:
+            print(f"  ! {module} took longer than the budget of {args.budget} ms")
+            failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
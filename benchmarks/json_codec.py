@@ -0,0 +1,62 @@
+"""各个可用 JSON 后端在典型事件载荷上的编解码耗时.
+
+    python benchmarks/json_codec.py
+
+`str` 两栏是旧的 `json_encode` + `u8_encode` / `u8_string` + `json_decode` 组合,
+`bytes` 两栏是直接在对象与 bytes 之间转换的 `json_encode_bytes` / `json_decode_bytes`.
+"""
+
+import json
+import timeit
+
+from avilla.core.transformers.codec import available_codecs
+from avilla.core.transformers.common import u8_encode, u8_string
+
+NUMBER = 2000
+
+
+def message_event(index: int) -> dict:
+    return {
+        "post_type": "message",
+        "message_type": "group",
+        "time": 1650000000 + index,
+        "self_id": 10000,
+        "group_id": 123456789,
+        "user_id": 987654321 + index,
+        "message_id": index,
+        "sender": {"user_id": 987654321 + index, "nickname": f"用户{index}", "card": "", "role": "member"},
+        "message": [
+            {"type": "text", "data": {"text": "今天的天气怎么样? " * 3}},
+            {"type": "at", "data": {"qq": "10000"}},
+            {"type": "image", "data": {"file": f"{index:032x}.image", "url": "https://example.com/a.png"}},
+        ],
+        "raw_message": "今天的天气怎么样?",
+        "font": 0,
+    }
+
+
+PAYLOADS = {
+    "single event": message_event(0),
+    "batch of 100 events": {"events": [message_event(i) for i in range(100)]},
+}
+
+
+def main():
+    print(f"{'codec':<10}{'payload':<22}{'str enc':>12}{'bytes enc':>12}{'str dec':>12}{'bytes dec':>12}")
+    for codec in available_codecs():
+        for name, payload in PAYLOADS.items():
+            raw = codec.dumpb(payload)
+            text = raw.decode("utf-8")
+            assert codec.loadb(raw) == json.loads(text) == payload
+
+            costs = [
+                timeit.timeit(lambda: u8_encode(codec.dumps(payload)), number=NUMBER),
+                timeit.timeit(lambda: codec.dumpb(payload), number=NUMBER),
+                timeit.timeit(lambda: codec.loads(u8_string(raw)), number=NUMBER),
+                timeit.timeit(lambda: codec.loadb(raw), number=NUMBER),
+            ]
+            print(f"{codec.name:<10}{name:<22}" + "".join(f"{cost / NUMBER * 1e6:>9.2f} us" for cost in costs))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""MessageChain 各操作 (含 as_display 的缓存) 的单次耗时.
+
+    python benchmarks/message_chain.py
+
+`legacy` 一栏是以 pydantic `__root__` 模型承载同样元素时的构造开销, 即旧实现中每次操作都要付出的校验成本.
+"""
+
+import timeit
+from typing import List
+
+from pydantic import BaseModel
+
+from avilla.core.builtins.elements import Image, Notice, Text
+from avilla.core.message.chain import MessageChain
+from avilla.core.message.element import Element
+from avilla.core.provider import RawProvider
+
+NUMBER = 20000
+
+
+class LegacyMessageChain(BaseModel):
+    __root__: List[Element]
+
+    class Config:
+        arbitrary_types_allowed = True
+
+
+def sample_elements() -> List[Element]:
+    return [
+        Text("/cmd --flag value "),
+        Notice("10000"),
+        Text(" some "),
+        Text("text here"),
+        Image(RawProvider(b"")),
+        Text(" tail words and more"),
+    ]
+
+
+def bench(name: str, stmt, number: int = NUMBER):
+    cost = timeit.timeit(stmt, number=number) / number
+    print(f"{name:<32}{cost * 1e6:>10.3f} us/op")
+
+
+def main():
+    elements = sample_elements()
+    chain = MessageChain.create(elements)
+
+    bench("legacy pydantic construct", lambda: LegacyMessageChain(__root__=elements))
+    bench("create (validated)", lambda: MessageChain.create(elements))
+    bench("_trusted", lambda: MessageChain._trusted(elements))
+    bench("subchain", lambda: chain.subchain(slice((1, None), (4, None))))
+    bench("as_merged", chain.as_merged)
+    bench("split", lambda: chain.split(" "))
+    bench("exclude", lambda: chain.exclude(Image))
+    bench("include", lambda: chain.include(Text))
+    bench("plus_with", lambda: chain.plus_with(chain))
+
+    def display_cold():
+        chain.invalidate()
+        return chain.as_display()
+
+    bench("as_display (uncached)", display_cold)
+    bench("as_display (cached)", chain.as_display)
+
+    def display_after_plus():
+        mutable = MessageChain.create(elements)
+        mutable.as_display()
+        mutable.plus(tail)
+        return mutable.as_display()
+
+    tail = MessageChain.create([Text(" appended")])
+    bench("create + display + plus", display_after_plus)
+
+
+if __name__ == "__main__":
+    main()
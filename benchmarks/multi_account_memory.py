@@ -0,0 +1,106 @@
+"""多个账号共享一个 Avilla 进程与每个账号各占一个进程时的内存占用.
+
+    python benchmarks/multi_account_memory.py [--accounts N] [--relationships R]
+
+每种配置在独立的子进程中运行: 以 N 个账号 (`configs[protocol]` 为列表) 构造 Avilla, 共享一个 AiohttpHttpClient,
+并为每个账号缓存 R 个 Relationship, 之后记录 RSS. 每个账号一个进程时的总占用按单账号进程的 RSS × N 估算.
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+
+PROBE = """
+import asyncio, gc, json, os, resource
+from graia.broadcast import Broadcast
+from avilla.core import Avilla
+from avilla.core.launch import LaunchComponent
+from avilla.core.network.aiohttp.service import AiohttpHttpClient
+from avilla.core.protocol import BaseProtocol
+from avilla.core.selectors import rsctx, self as self_selector
+
+
+class BenchProtocol(BaseProtocol):
+    def ensure_networks(self):
+        return [], None
+
+    def get_self(self):
+        return self_selector.account[str(self.config)]
+
+    async def parse_message(self, data):
+        raise NotImplementedError
+
+    async def serialize_message(self, message):
+        raise NotImplementedError
+
+    async def launch_mainline(self):
+        pass
+
+    @property
+    def launch_component(self):
+        return LaunchComponent("avilla.protocol/bench", set(), self.launch_mainline)
+
+    async def lookup_metadata(self, metascope):
+        return []
+
+    async def operate_metadata(self, metascope, metakey, operator, value):
+        pass
+
+
+def rss():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+async def main():
+    broadcast = Broadcast(loop=asyncio.get_running_loop())
+    configs = {{BenchProtocol: list(range({accounts}))}}
+    avilla = Avilla(broadcast, BenchProtocol, [AiohttpHttpClient()], configs)
+    for protocol in avilla.protocols.values():
+        for i in range({relationships}):
+            await protocol.get_relationship(rsctx.group[str(i)])
+    gc.collect()
+    print(json.dumps([len(avilla.protocols), rss()]))
+
+
+asyncio.run(main())
+"""
+
+
+def measure(accounts: int, relationships: int) -> int:
+    output = subprocess.run(
+        [sys.executable, "-c", PROBE.format(accounts=accounts, relationships=relationships)],
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    created, rss = json.loads(output.splitlines()[-1])
+    assert created == accounts
+    return rss
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--accounts", type=int, default=50)
+    parser.add_argument("--relationships", type=int, default=200)
+    args = parser.parse_args()
+
+    single = measure(1, args.relationships)
+    shared = measure(args.accounts, args.relationships)
+    separate = single * args.accounts
+    marginal = (shared - single) / max(args.accounts - 1, 1)
+
+    mib = 1024 * 1024
+    print(f"accounts={args.accounts} relationships/account={args.relationships}")
+    print(f"one process per account   {separate / mib:>10.1f} MiB  ({single / mib:.1f} MiB each)")
+    print(f"one shared process        {shared / mib:>10.1f} MiB")
+    print(f"marginal per account      {marginal / 1024:>10.1f} KiB")
+    print(f"saved                     {(separate - shared) / mib:>10.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
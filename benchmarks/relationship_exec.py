@@ -0,0 +1,55 @@
+"""`rs.exec(MessageSend(...))` 的吞吐量, 协议端的 ensure_execution 直接返回.
+
+python benchmarks/relationship_exec.py
+"""
+
+import asyncio
+import time
+from contextlib import asynccontextmanager
+
+from avilla.core.builtins.elements import Text
+from avilla.core.execution.message import MessageId, MessageSend
+from avilla.core.message.chain import MessageChain
+from avilla.core.relationship import Relationship
+from avilla.core.selectors import rsctx
+
+NUMBER = 100000
+
+
+class DummyProtocol:
+    def check_mainline(self, mainline) -> bool:
+        return True
+
+    async def ensure_execution(self, execution):
+        return MessageId("0")
+
+
+@asynccontextmanager
+async def noop_middleware(rs, execution):
+    yield
+
+
+async def bench(name: str, rs: Relationship, execution: MessageSend, configure=lambda wrapper: wrapper):
+    start = time.perf_counter()
+    for _ in range(NUMBER):
+        await configure(rs.exec(execution))
+    cost = time.perf_counter() - start
+    print(f"{name:<36}{NUMBER / cost:>12.0f} exec/s{cost / NUMBER * 1e6:>10.3f} us/op")
+
+
+async def main():
+    protocol = DummyProtocol()
+    target = rsctx("rsctx", {"group": "1"})
+    execution = MessageSend(MessageChain.create([Text("hello")]))
+
+    bare = Relationship(protocol, target, None)  # type: ignore
+    with_middleware = Relationship(protocol, target, None, [noop_middleware])  # type: ignore
+
+    await bench("no middleware (fast path)", bare, execution)
+    await bench(".to(target)", bare, execution, lambda wrapper: wrapper.to(target))
+    await bench("relationship middleware", with_middleware, execution)
+    await bench("relationship middleware + .to()", with_middleware, execution, lambda w: w.to(target))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
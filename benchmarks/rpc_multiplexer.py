@@ -0,0 +1,111 @@
+"""RpcMultiplexer 在单个 websocket 连接上的吞吐量与 p50/p99 延迟.
+
+    python benchmarks/rpc_multiplexer.py [--calls N] [--inflight C] [--delay-ms T]
+
+本地 aiohttp websocket 服务端对每个请求在随机的 0 ~ T 毫秒后 (乱序) 返回带有相同 echo 的响应,
+客户端保持 C 个调用同时在途.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import socket
+import time
+
+from aiohttp import WSMsgType, web
+
+from avilla.core.network.aiohttp.schema import WebsocketClientSchema
+from avilla.core.network.aiohttp.websocket import AiohttpWebsocketClient, WebsocketClientConfig
+from avilla.core.network.rpc import RpcMultiplexer
+from avilla.core.network.service import PolicyProtocol
+
+
+class RpcPolicy:
+    def __init__(self, service: AiohttpWebsocketClient) -> None:
+        self.service = service
+        self.ready: "asyncio.Future[RpcMultiplexer]" = asyncio.get_running_loop().create_future()
+
+    async def on_connected(self, protocol: PolicyProtocol) -> None:
+        assert protocol.connection_id is not None
+        self.rpc = RpcMultiplexer(self.service, protocol.connection_id)
+        self.ready.set_result(self.rpc)
+
+    async def on_frames(self, protocol: PolicyProtocol, frames: list) -> None:
+        self.rpc.feed_many(frames)
+
+    async def on_disconnected(self, protocol: PolicyProtocol) -> None:
+        self.rpc.close()
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def serve(delay: float, port: int) -> web.AppRunner:
+    async def handler(request: web.Request) -> web.WebSocketResponse:
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+
+        async def reply(data: dict) -> None:
+            if delay:
+                await asyncio.sleep(random.uniform(0, delay))
+            await ws.send_str(json.dumps({"status": "ok", "data": data["params"], "echo": data["echo"]}))
+
+        tasks = set()
+        async for message in ws:
+            if message.type == WSMsgType.TEXT:
+                task = asyncio.create_task(reply(json.loads(message.data)))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+        return ws
+
+    app = web.Application()
+    app.router.add_get("/", handler)
+    runner = web.AppRunner(app, handle_signals=False)
+    await runner.setup()
+    await web.TCPSite(runner, "127.0.0.1", port).start()
+    return runner
+
+
+async def main(calls: int, inflight: int, delay: float):
+    port = free_port()
+    runner = await serve(delay, port)
+    client = AiohttpWebsocketClient(config=WebsocketClientConfig(heartbeat=None, queue_size=inflight * 2))
+    policy = RpcPolicy(client)
+    client.register_endpoint(WebsocketClientSchema(f"http://127.0.0.1:{port}/"), policy)
+    await client.launch_prepare()
+    mainline = asyncio.create_task(client.launch_mainline())
+    rpc = await policy.ready
+
+    remaining = iter(range(calls))
+
+    async def caller():
+        for i in remaining:
+            await rpc.call({"action": "get_status", "params": {"i": i}})
+
+    start = time.perf_counter()
+    await asyncio.gather(*[caller() for _ in range(inflight)])
+    cost = time.perf_counter() - start
+
+    client.stop()
+    await mainline
+    await client.launch_cleanup()
+    await runner.cleanup()
+
+    summary = rpc.latency_summary()
+    print(f"calls={calls} inflight={inflight} delay<={delay * 1000}ms")
+    print(f"throughput          {calls / cost:>10.0f} calls/s")
+    print(f"p50 / p99           {summary['p50'] * 1000:>10.2f} / {summary['p99'] * 1000:.2f} ms")
+    print(f"errors / timeouts   {summary['errors']:>10} / {summary['timeouts']}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--calls", type=int, default=50000)
+    parser.add_argument("--inflight", type=int, default=2000)
+    parser.add_argument("--delay-ms", type=float, default=5.0)
+    args = parser.parse_args()
+    asyncio.run(main(args.calls, args.inflight, args.delay_ms / 1000))
@@ -0,0 +1,23 @@
+import asyncio
+import subprocess
+import sys
+
+from avilla.core.network.aiohttp.server import AiohttpRequestPolicyProtocol
+from avilla.core.network.builtins.activities import SetStatusCode, Write, WriteText
+
+
+def test_write_and_write_text_build_body():
+    async def main():
+        protocol = AiohttpRequestPolicyProtocol(None, None)  # type: ignore
+        await protocol.apply(Write(b"a"), WriteText("é"), SetStatusCode(201))
+        response = protocol.build_response()
+        assert response.status == 201
+        assert response.body == b"a" + "é".encode()
+
+    asyncio.run(main())
+
+
+def test_import_does_not_load_loguru():
+    code = "import sys, avilla.core.network.aiohttp.server; print('loguru' in sys.modules)"
+    output = subprocess.run([sys.executable, "-c", code], check=True, capture_output=True, text=True).stdout
+    assert output.strip() == "False"
@@ -0,0 +1,24 @@
+import pytest
+
+from avilla.core.transformers.codec import AUTO, available_codecs, get_codec, set_default_codec
+
+PAYLOAD = {"text": "中文 é ☃", "list": [1, 2.5, None, True], "nested": {"k": "v"}}
+
+
+@pytest.mark.parametrize("codec", available_codecs(), ids=lambda codec: codec.name)
+def test_dumps_and_dumpb_agree(codec):
+    assert codec.dumpb(PAYLOAD) == codec.dumps(PAYLOAD).encode("utf-8")
+    assert codec.loads(codec.dumps(PAYLOAD)) == PAYLOAD
+    assert codec.loadb(codec.dumpb(PAYLOAD)) == PAYLOAD
+
+
+def test_default_codec_selection():
+    try:
+        assert get_codec().name == "json"
+        set_default_codec(AUTO)
+        assert get_codec() is available_codecs()[0]
+        with pytest.raises(KeyError):
+            set_default_codec("missing")
+    finally:
+        set_default_codec(None)
+    assert get_codec().name == "json"
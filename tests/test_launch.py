@@ -0,0 +1,91 @@
+import asyncio
+import gc
+import sys
+from typing import List
+
+import pytest
+
+from avilla.core.launch import LaunchComponent, RequirementResolveFailed, run_components
+
+
+def component(component_id: str, required: List[str], action=None) -> LaunchComponent:
+    async def mainline():
+        pass
+
+    return LaunchComponent(component_id, set(required), mainline, action)
+
+
+def test_dependencies_finish_first():
+    order = []
+
+    def record(component_id: str):
+        async def action():
+            await asyncio.sleep(0)
+            order.append(component_id)
+
+        return action
+
+    components = [
+        component("a", [], record("a")),
+        component("b", ["a"], record("b")),
+        component("c", ["a"], None),
+        component("d", ["b", "c"], record("d")),
+    ]
+    timings = asyncio.run(run_components(components, lambda c: c.prepare))
+    assert order == ["a", "b", "d"]
+    assert set(timings) == {"a", "b", "c", "d"}
+
+    order.clear()
+    asyncio.run(run_components(components, lambda c: c.prepare, reverse=True))
+    assert order == ["d", "b", "a"]
+
+
+def test_long_chain_does_not_recurse():
+    length = sys.getrecursionlimit() * 2
+    components = [component(str(i), [str(i - 1)] if i else []) for i in range(length)]
+    timings = asyncio.run(run_components(components, lambda c: c.prepare))
+    assert len(timings) == length
+
+
+def test_failure_cancels_and_awaits_the_rest():
+    cancelled = []
+    contexts = []
+
+    async def fail():
+        raise RuntimeError("first")
+
+    async def also_fail():
+        raise ValueError("second")
+
+    async def slow():
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise OSError("cleanup after cancellation failed")
+
+    async def main():
+        asyncio.get_running_loop().set_exception_handler(lambda loop, context: contexts.append(context))
+        components = [component("a", [], fail), component("b", [], also_fail), component("c", [], slow)]
+        with pytest.raises((RuntimeError, ValueError)):
+            await run_components(components, lambda c: c.prepare)
+        assert cancelled == [True]
+
+    asyncio.run(main())
+    gc.collect()
+    assert not contexts
+
+
+def test_suppressed_errors_are_recorded():
+    async def fail():
+        raise RuntimeError("x")
+
+    components = [component("a", [], fail), component("b", ["a"])]
+    timings = asyncio.run(run_components(components, lambda c: c.prepare, suppress_exceptions=True))
+    assert isinstance(timings["a"].error, RuntimeError)
+    assert timings["b"].error is None
+
+
+def test_unknown_requirement():
+    with pytest.raises(RequirementResolveFailed):
+        asyncio.run(run_components([component("a", ["missing"])], lambda c: c.prepare))
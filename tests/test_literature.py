@@ -0,0 +1,109 @@
+import getopt
+import random
+import shlex
+
+import pytest
+
+from avilla.core.builtins.elements import Notice, Text
+from avilla.core.message.chain import MessageChain
+from avilla.core.tools.literature import Literature, shell_split
+from avilla.core.tools.literature.pattern import BoxParameter, SwitchParameter
+
+
+def outcome(func, *args, error=Exception):
+    try:
+        return func(*args)
+    except error as e:
+        return ("error", type(e), str(e))
+
+
+def plain(chain: MessageChain) -> list:
+    return [("text", element.text) if isinstance(element, Text) else element for element in chain]
+
+
+def test_shell_split_matches_shlex():
+    rng = random.Random(1)
+    alphabet = ["a", "b", " ", "\t", "\n", '"', "'", "\\", "$", "-", "="]
+    for _ in range(20000):
+        string = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 12)))
+        expected = outcome(shlex.split, string, error=ValueError)
+        assert outcome(shell_split, string, error=ValueError) == expected, string
+
+
+@pytest.mark.parametrize("string", ['"\\', '"a\\"\\', "'\\", "\\", '"\\\\'])
+def test_shell_split_unterminated(string):
+    assert outcome(shell_split, string) == outcome(shlex.split, string)
+
+
+def test_parse_options_matches_getopt():
+    literature = Literature(
+        "cmd",
+        arguments={
+            "v": SwitchParameter(["verbose", "verb"], "v"),
+            "o": BoxParameter(["output", "out"], "o"),
+            "n": BoxParameter(["name"], None, default="d"),
+            "x": SwitchParameter(["xtra"], "x"),
+        },
+    )
+    names = {
+        "-v": "v",
+        "-o": "o",
+        "-x": "x",
+        "--verbose": "v",
+        "--verb": "v",
+        "--output": "o",
+        "--out": "o",
+        "--name": "n",
+        "--xtra": "x",
+    }
+
+    def expected(args):
+        options, remains = getopt.getopt(
+            args, "vo:x", ["verbose", "verb", "output=", "out=", "name=", "xtra"]
+        )
+        return [(names[key], value) for key, value in options], remains
+
+    tokens = ["-v", "-o", "-vo", "-ov", "-vx", "-q", "-", "--", "a", "b"]
+    tokens += ["--verb", "--verbose", "--ve", "--o", "--out", "--output=1", "--out=2", "--name", "--n=3"]
+    tokens += ["--x", "--xtra=1", "--zz"]
+    rng = random.Random(2)
+    for _ in range(20000):
+        args = [rng.choice(tokens) for _ in range(rng.randint(0, 6))]
+        assert outcome(literature.parse_options, args, error=getopt.GetoptError) == outcome(
+            expected, args, error=getopt.GetoptError
+        ), args
+
+
+def test_subchain_view_matches_subchain():
+    rng = random.Random(5)
+
+    def index():
+        if rng.random() < 0.3:
+            return None
+        return (rng.randint(-3, 5), rng.choice([None, None, rng.randint(-3, 5)]))
+
+    for _ in range(5000):
+        elements = [
+            (
+                Text("".join(rng.choice("ab ") for _ in range(rng.randint(0, 4))))
+                if rng.random() < 0.7
+                else Notice("1")
+            )
+            for _ in range(rng.randint(0, 5))
+        ]
+        chain = MessageChain.create(elements)
+        item = slice(index(), index())
+        ignore_text_index = rng.random() < 0.5
+
+        expected = outcome(lambda: plain(chain.subchain(item, ignore_text_index)), error=TypeError)
+        view = outcome(chain.subchain_view, item, ignore_text_index, error=TypeError)
+        if isinstance(view, tuple):
+            assert view == expected, (elements, item, ignore_text_index)
+            continue
+        copied = chain.subchain(item, ignore_text_index)
+        assert plain(view) == expected, (elements, item, ignore_text_index)
+        assert view.startswith("a") == copied.startswith("a")
+        assert view.endswith("b") == copied.endswith("b")
+        assert [plain(frame) for frame in view.iter_split(" ")] == [
+            plain(frame) for frame in copied.split(" ")
+        ]
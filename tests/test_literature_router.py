@@ -0,0 +1,63 @@
+import random
+
+from avilla.core.builtins.elements import Notice, Text
+from avilla.core.message.chain import MessageChain
+from avilla.core.tools.literature import Literature
+from avilla.core.tools.literature.router import LiteratureRouter
+
+
+def plain(chain: MessageChain) -> list:
+    return [element.text if isinstance(element, Text) else element for element in chain]
+
+
+def test_router_matches_prefix_match():
+    rng = random.Random(3)
+    words = ["a", "b", "c", ""]
+    router = LiteratureRouter()
+    routed = []
+    for _ in range(40):
+        prefixs = tuple(rng.choice(words[:3]) for _ in range(rng.randint(0, 3)))
+        routed.append(Literature(*prefixs, router=router))
+    standalone = [Literature(*literature.prefixs) for literature in routed]
+
+    for _ in range(500):
+        elements = []
+        for _ in range(rng.randint(0, 5)):
+            if rng.random() < 0.8:
+                elements.append(Text(" ".join(rng.choice(words) for _ in range(rng.randint(1, 3)))))
+            else:
+                elements.append(Notice("1"))
+        chain = MessageChain.create(elements)
+        for literature, reference in zip(routed, standalone):
+            result, expected = router.lookup(chain, literature), reference.prefix_match(chain)
+            assert (result is None) == (expected is None)
+            if result is not None:
+                assert plain(result) == plain(expected)
+    assert router.stats.routed == 500
+
+
+def test_route_is_cached_per_chain_until_modified():
+    router = LiteratureRouter()
+    a, b = Literature("a", router=router), Literature("b", router=router)
+    chain = MessageChain.create([Text("a x")])
+    assert router.lookup(chain, a) is not None
+    assert router.lookup(chain, b) is None
+    assert router.stats.routed == 1
+
+    # 内容相同的另一条消息链不共用结果
+    router.lookup(MessageChain.create([Text("a x")]), a)
+    assert router.stats.routed == 2
+
+    chain.__root__[0] = Text("b y")
+    chain.invalidate()
+    assert router.lookup(chain, a) is None
+    assert router.lookup(chain, b) is not None
+    assert router.stats.routed == 3
+
+    chain.plus(MessageChain.create([Text(" z")]))
+    assert plain(router.lookup(chain, b)) == ["y z"]  # type: ignore
+    assert router.stats.routed == 4
+
+    c = Literature("c", router=router)
+    assert router.lookup(chain, c) is None
+    assert router.stats.routed == 5
@@ -0,0 +1,81 @@
+import asyncio
+import gc
+import warnings
+
+import pytest
+
+from avilla.core.builtins.elements import Image, Text, Voice
+from avilla.core.message.chain import MessageChain
+from avilla.core.provider import RawProvider
+from avilla.core.utilles.message import MessageSerializeBus
+
+
+def test_serialize_batch_keeps_order():
+    bus = MessageSerializeBus()
+
+    @bus.register(Text)
+    def _(element: Text):
+        return ("text", element.text)
+
+    @bus.register(Image)
+    async def _(element: Image):
+        data = await element.provider()
+        await asyncio.sleep(0.01 if data == b"1" else 0)
+        return ("image", data)
+
+    chain = MessageChain.create([Text("a"), Image(RawProvider(b"1")), Text("b"), Image(RawProvider(b"2"))])
+    result = asyncio.run(bus.serialize_batch(chain, concurrency=2))
+    assert result == [("text", "a"), ("image", b"1"), ("text", "b"), ("image", b"2")]
+    assert result == asyncio.run(bus.serialize(chain))
+
+
+def test_serialize_batch_awaits_cancelled_tasks():
+    finished = []
+    contexts = []
+    bus = MessageSerializeBus()
+
+    @bus.register(Image)
+    async def _(element: Image):
+        try:
+            await asyncio.sleep(10)
+        finally:
+            finished.append(element)
+
+    @bus.register(Voice)
+    async def _(element: Voice):
+        raise RuntimeError("voice")
+
+    @bus.register(Text)
+    async def _(element: Text):
+        await asyncio.sleep(0.01)
+        raise ValueError("text")
+
+    async def main():
+        asyncio.get_running_loop().set_exception_handler(lambda loop, context: contexts.append(context))
+        chain = MessageChain.create([Image(RawProvider(b"")), Voice(RawProvider(b"")), Text("x")])
+        with pytest.raises(ValueError):
+            await bus.serialize_batch(chain)
+        assert len(finished) == 1
+
+    asyncio.run(main())
+    gc.collect()
+    assert not contexts
+
+
+def test_serialize_batch_closes_unstarted_serializers():
+    bus = MessageSerializeBus()
+
+    @bus.register(Image)
+    async def _(element: Image):
+        return b""
+
+    @bus.register(Text)
+    def _(element: Text):
+        raise ValueError("text")
+
+    chain = MessageChain.create([Image(RawProvider(b"")), Text("x")])
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        with pytest.raises(ValueError):
+            asyncio.run(bus.serialize_batch(chain))
+        gc.collect()
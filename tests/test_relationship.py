@@ -0,0 +1,37 @@
+import asyncio
+from datetime import timedelta
+
+from avilla.core.context import ctx_rsexec_period, ctx_rsexec_to
+from avilla.core.relationship import Relationship
+from avilla.core.selectors import rsctx
+
+
+class EchoProtocol:
+    def check_mainline(self, mainline) -> bool:
+        return True
+
+    async def ensure_execution(self, execution):
+        return execution, ctx_rsexec_to.get(), ctx_rsexec_period.get()
+
+
+def test_to_and_period_reuse_injectors():
+    rs = Relationship(EchoProtocol(), rsctx.group["1"], None)  # type: ignore
+    target = rsctx.group["2"]
+    first = rs.exec("a").to(target).period(timedelta(seconds=1))
+    second = rs.exec("b").to(target).period(timedelta(seconds=1))
+    assert first.middlewares[0] is second.middlewares[0]
+    assert first.middlewares[1] is second.middlewares[1]
+    assert rs.exec("c").to(rsctx.group["2"]).middlewares[0] is not first.middlewares[0]
+
+
+def test_injected_context_is_restored():
+    async def main():
+        rs = Relationship(EchoProtocol(), rsctx.group["1"], None)  # type: ignore
+        target = rsctx.group["2"]
+        results = await asyncio.gather(
+            rs.exec("a").to(target), rs.exec("b").period(timedelta(seconds=3)), rs.exec("c")
+        )
+        assert results == [("a", target, None), ("b", None, timedelta(seconds=3)), ("c", None, None)]
+        assert ctx_rsexec_to.get() is None
+
+    asyncio.run(main())
@@ -0,0 +1,156 @@
+import asyncio
+from typing import List
+
+from avilla.core.builtins.elements import Text
+from avilla.core.builtins.scheduler import ExecutionScheduler
+from avilla.core.execution.message import MessageId, MessageSend
+from avilla.core.launch import LaunchComponent
+from avilla.core.message.chain import MessageChain
+from avilla.core.protocol import BaseProtocol
+from avilla.core.relationship import Relationship
+from avilla.core.selectors import rsctx
+from avilla.core.selectors import self as self_selector
+
+
+class RecordingProtocol(BaseProtocol):
+    "记录 ensure_execution 收到的消息; 可在发送途中取消指定的 Task."
+
+    sent: List[str]
+    cancel_on_send: "List[asyncio.Task]"
+
+    def __init__(self, account: str = "1", delay: float = 0.01) -> None:
+        super().__init__(None, account)  # type: ignore
+        self.delay = delay
+        self.sent = []
+        self.cancel_on_send = []
+
+    def ensure_networks(self):
+        return [], None
+
+    def get_self(self):
+        return self_selector.account[self.config]
+
+    async def ensure_execution(self, execution):
+        self.sent.append(execution.message.as_display())
+        while self.cancel_on_send:
+            self.cancel_on_send.pop().cancel()
+        await asyncio.sleep(self.delay)
+        return MessageId(f"{self.config}-{len(self.sent)}")
+
+    async def parse_message(self, data):
+        raise NotImplementedError
+
+    async def serialize_message(self, message):
+        raise NotImplementedError
+
+    async def launch_mainline(self):
+        pass
+
+    @property
+    def launch_component(self):
+        return LaunchComponent("avilla.protocol/test", set(), self.launch_mainline)
+
+    async def lookup_metadata(self, metascope):
+        return []
+
+    async def operate_metadata(self, metascope, metakey, operator, value):
+        pass
+
+
+def message(text: str) -> MessageSend:
+    return MessageSend(MessageChain.create([Text(text)]))
+
+
+def relationship(protocol: BaseProtocol, scheduler: ExecutionScheduler) -> Relationship:
+    return Relationship(protocol, rsctx.group["1"], protocol.get_self(), [scheduler])
+
+
+def test_coalesce_shares_one_send():
+    async def main():
+        protocol = RecordingProtocol()
+        rs = relationship(protocol, ExecutionScheduler(rate=100, burst=1, coalesce=True))
+        sends = [message(f"m{i}") for i in range(3)]
+        results = await asyncio.gather(*[rs.exec(send) for send in sends])
+        assert protocol.sent == ["m0\nm1\nm2"]
+        assert len({id(result) for result in results}) == 1
+        assert [send.message.as_display() for send in sends] == ["m0", "m1", "m2"]
+
+    asyncio.run(main())
+
+
+def test_cancelled_leader_requeues_followers():
+    async def main():
+        protocol = RecordingProtocol()
+        scheduler = ExecutionScheduler(rate=100, burst=1, coalesce=True)
+        rs = relationship(protocol, scheduler)
+        tasks = [asyncio.ensure_future(rs.exec(message(f"m{i}"))) for i in range(4)]
+        protocol.cancel_on_send.append(tasks[0])
+        results = await asyncio.wait_for(asyncio.gather(*tasks, return_exceptions=True), 2)
+
+        assert isinstance(results[0], asyncio.CancelledError)
+        assert protocol.sent == ["m0\nm1\nm2\nm3", "m1\nm2\nm3"]
+        assert all(isinstance(result, MessageId) for result in results[1:])
+        assert scheduler.stats.coalesced == 2
+        assert scheduler.queue_depth() == 0
+
+    asyncio.run(main())
+
+
+def test_cancelled_follower_does_not_affect_others():
+    async def main():
+        protocol = RecordingProtocol()
+        rs = relationship(protocol, ExecutionScheduler(rate=100, burst=1, coalesce=True))
+        tasks = [asyncio.ensure_future(rs.exec(message(f"m{i}"))) for i in range(3)]
+        protocol.cancel_on_send.append(tasks[1])
+        results = await asyncio.wait_for(asyncio.gather(*tasks, return_exceptions=True), 2)
+
+        assert protocol.sent == ["m0\nm1\nm2"]
+        assert isinstance(results[1], asyncio.CancelledError)
+        assert isinstance(results[0], MessageId) and results[0] is results[2]
+
+    asyncio.run(main())
+
+
+def test_accounts_do_not_share_buckets_or_sends():
+    async def main():
+        scheduler = ExecutionScheduler(rate=100, burst=1, coalesce=True)
+        first, second = RecordingProtocol("1"), RecordingProtocol("2")
+        rs_first, rs_second = relationship(first, scheduler), relationship(second, scheduler)
+        await asyncio.gather(
+            rs_first.exec(message("a0")),
+            rs_second.exec(message("b0")),
+            rs_first.exec(message("a1")),
+            rs_second.exec(message("b1")),
+        )
+        assert first.sent == ["a0\na1"]
+        assert second.sent == ["b0\nb1"]
+        assert scheduler.target_key(rs_first) != scheduler.target_key(rs_second)
+
+    asyncio.run(main())
+
+
+def test_exec_directly_honours_shortcut():
+    async def main():
+        protocol = RecordingProtocol()
+        scheduler = ExecutionScheduler(rate=100, burst=1, coalesce=True)
+        results = await asyncio.gather(
+            *[protocol.exec_directly(message(f"m{i}"), scheduler) for i in range(3)]
+        )
+        assert protocol.sent == ["m0\nm1\nm2"]
+        assert len({id(result) for result in results}) == 1
+
+    asyncio.run(main())
+
+
+def test_priority_orders_queue():
+    async def main():
+        protocol = RecordingProtocol(delay=0)
+        scheduler = ExecutionScheduler(
+            rate=1000, burst=1, priority=lambda execution: -len(execution.message.as_display())
+        )
+        rs = relationship(protocol, scheduler)
+        await asyncio.gather(*[rs.exec(message("x" * n)) for n in (1, 2, 3)])
+        assert protocol.sent == ["xxx", "xx", "x"]
+        assert scheduler.stats.dispatched == 3
+
+    asyncio.run(main())
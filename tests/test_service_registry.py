@@ -0,0 +1,38 @@
+import pytest
+
+from avilla.core.network.aiohttp.service import AiohttpHttpClient
+from avilla.core.network.aiohttp.websocket import AiohttpWebsocketClient
+from avilla.core.network.registry import ServiceRegistry
+from avilla.core.network.service import Service
+
+
+def test_indexes():
+    client, first, second = AiohttpHttpClient(), AiohttpWebsocketClient(), AiohttpWebsocketClient()
+    registry = ServiceRegistry([client, first, second])
+    assert registry.get(first.id.avilla_uri) is first
+    assert registry.get_all(first.id.avilla_uri) == [first, second]
+    assert registry.first_of_type(AiohttpHttpClient) is client
+    assert registry.by_type(Service) == [client, first, second]
+
+    registry.remove(first)
+    assert registry.get(first.id.avilla_uri) is second
+    with pytest.raises(ValueError):
+        registry.add(client)
+
+
+def test_list_operations():
+    client, websocket = AiohttpHttpClient(), AiohttpWebsocketClient()
+    registry = ServiceRegistry()
+    registry.append(client)
+    registry.extend([websocket])
+    assert list(registry) == [client, websocket]
+    assert registry[0] is client and registry[-1] is websocket
+    assert registry[1:] == [websocket]
+    assert list(reversed(registry)) == [websocket, client]
+    assert registry.index(websocket) == 1 and registry.count(client) == 1
+    assert client in registry and len(registry) == 2
+
+    assert registry.pop() is websocket
+    assert registry.first_of_type(AiohttpWebsocketClient) is None
+    registry.clear()
+    assert not registry and registry.first_of_type(Service) is None